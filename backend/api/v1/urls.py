@@ -1,4 +1,5 @@
 
+from django.conf import settings
 from django.urls import include, path
 
 urlpatterns = [
@@ -6,3 +7,8 @@ urlpatterns = [
     path('', include('recipes.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.AUTH_JWT:
+    # jwt/create/, jwt/refresh/ and jwt/verify/; POST auth/token/logout/
+    # with a JWT revokes every token of the user.
+    urlpatterns.append(path('auth/', include('djoser.urls.jwt')))
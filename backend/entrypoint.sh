@@ -1,23 +1,14 @@
 #!/bin/bash
 set -e
 
-# Fake-initial for already existing tables
-python3.11 manage.py migrate --fake-initial
-
-# Apply all migrations
-python3.11 manage.py migrate
-
-# Collect static files
-python3.11 manage.py collectstatic --noinput
-
-# Copy collected static to the right place
-cp -r /app/collected_static/. /backend_static/static/
-
-# Ensure the data file is executable (not really necessary for .py, but included as per your command)
-chmod +x /app/data/load_data.py
-
-# Load data into the app
-python3.11 manage.py shell < /app/data/load_data.py
-
-# Start the Gunicorn server
+# Migrate, collect static files and load the catalog, skipping unchanged
+# steps; replicas starting together wait on a database lock
+python3.11 manage.py boot --static-target /backend_static/static/
+
+# Start the Gunicorn server: ASGI workers with the async read views
+# when DJANGO_ASGI=true, otherwise sync WSGI workers
+if [ "$DJANGO_ASGI" = "true" ]; then
+    exec gunicorn --bind 0.0.0.0:8000 \
+        --worker-class uvicorn.workers.UvicornWorker foodgram.asgi
+fi
 exec gunicorn --bind 0.0.0.0:8000 foodgram.wsgi
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+# No persistent database connections, see DATABASES.
+os.environ.setdefault('DJANGO_ASGI', 'true')
+# Serve the hot read endpoints with their async views.
+os.environ.setdefault('ASYNC_READ_VIEWS', 'true')
 
 application = get_asgi_application()
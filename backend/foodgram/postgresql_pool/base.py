@@ -0,0 +1,97 @@
+# foodgram/postgresql_pool/base.py
+
+"""
+PostgreSQL backend that takes its connections from a psycopg pool.
+
+Configured with OPTIONS['pool'], the psycopg_pool.ConnectionPool
+arguments (min_size, max_size, timeout, ...). Every process gets its
+own pool, opened on the first query, so pools aren't shared by forked
+gunicorn workers. Closing a connection at the end of a request returns
+it to the pool; with CONN_HEALTH_CHECKS the pool checks it on checkout.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import (IsolationLevel,
+                                                       is_psycopg3)
+from django.utils.asyncio import async_unsafe
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # alias -> pool of this process.
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if not pool_options:
+            return None
+        if self.alias not in self._connection_pools:
+            if self.settings_dict["CONN_MAX_AGE"] != 0:
+                raise ImproperlyConfigured(
+                    "Pooled connections can't be persistent, "
+                    "set CONN_MAX_AGE to 0.")
+            if not is_psycopg3:
+                raise ImproperlyConfigured(
+                    "Connection pooling requires psycopg 3.")
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as err:
+                raise ImproperlyConfigured(
+                    "Error loading psycopg_pool module.") from err
+            if pool_options is True:
+                pool_options = {}
+            kwargs = self.get_connection_params()
+            # Django sets the autocommit mode of every checkout.
+            kwargs["autocommit"] = True
+            pool = ConnectionPool(
+                kwargs=kwargs,
+                open=False,
+                check=(ConnectionPool.check_connection
+                       if self.settings_dict["CONN_HEALTH_CHECKS"] else None),
+                name=self.alias,
+                **pool_options,
+            )
+            # Threads racing on the first query keep the same pool.
+            self._connection_pools.setdefault(self.alias, pool)
+        return self._connection_pools[self.alias]
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level")
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None
+                else isolation_level)
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values.")
+        # Opened by the first query of the process, a no-op afterwards.
+        pool.open()
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back whatever the request left open.
+            self.connection._pool.putconn(self.connection)
+            self.connection = None
+
+    def get_pool_stats(self):
+        """Return the psycopg pool counters, None before the pool opens."""
+        pool = self._connection_pools.get(self.alias)
+        return pool and pool.get_stats()
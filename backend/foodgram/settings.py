@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -63,6 +64,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# Set by foodgram/asgi.py and entrypoint.sh when serving ASGI
+DJANGO_ASGI = os.getenv('DJANGO_ASGI', 'false').lower() == 'true'
+
 # Database
 DATABASES = {
     'default': {
@@ -73,10 +77,64 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        # Keep connections open between requests for this many seconds
+        # (0 closes them after every request), checked before reuse. ASGI
+        # runs requests in short-lived threads whose connections would
+        # never be reused or closed, use DB_POOL there instead
+        'CONN_MAX_AGE': (
+            0 if DJANGO_ASGI else int(os.getenv('DB_CONN_MAX_AGE', 60))),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# psycopg connection pool of every worker process
+# (foodgram.postgresql_pool), replaces persistent connections. Size it
+# for the worker's threads: max size times the number of workers must
+# stay below the server's max_connections
+DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+if DB_POOL:
+    DATABASES['default'].update(
+        ENGINE='foodgram.postgresql_pool',
+        CONN_MAX_AGE=0,
+        OPTIONS={'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+        }},
+    )
+
+# Cache versions (recipes.cache), short link and token revocations are
+# shared by every worker, so the cache is Redis. CACHE_BACKEND=
+# django.core.cache.backends.locmem.LocMemCache suits a single process
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://localhost:6379/0'),
     }
 }
 
+# Per-user favorite/cart/subscription id sets, see recipes.relations.
+# Read from the database on every request by default;
+# recipes.relations.RedisRelationStore with {'url': ...} keeps them in
+# Redis instead, CacheRelationStore in the default cache
+RELATION_STORE = {
+    'BACKEND': os.getenv(
+        'RELATION_STORE_BACKEND', 'recipes.relations.DatabaseRelationStore'),
+    'OPTIONS': (
+        {'url': os.getenv('RELATION_STORE_URL')}
+        if os.getenv('RELATION_STORE_URL') else {}
+    ),
+}
+
+# Short link codes are derived from this secret, changing it breaks
+# every link handed out before
+SHORT_LINK_SECRET = os.getenv('SHORT_LINK_SECRET', SECRET_KEY)
+SHORT_LINK_MAX_AGE = 60 * 60 * 24 * 30
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,16 +165,68 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Stream every multipart file to a temporary file instead of memory
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Resumable chunked uploads, see recipes.uploads
+CHUNKED_UPLOAD_ROOT = os.getenv(
+    'CHUNKED_UPLOAD_ROOT', os.path.join(BASE_DIR, 'uploads'))
+CHUNKED_UPLOAD_MAX_SIZE = int(
+    os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 20 * 1024 * 1024))
+CHUNKED_UPLOAD_EXPIRY = int(os.getenv('CHUNKED_UPLOAD_EXPIRY', 24 * 60 * 60))
+
+# Resized image variants (longest side in pixels), rendered in WebP and JPEG
+IMAGE_VARIANTS = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1200,
+}
+# Size of the per-worker image processing pool, 0 renders inline
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+
+# Boot time (seconds) above which manage.py boot reports a warning
+BOOT_TIME_TARGET = float(os.getenv('BOOT_TIME_TARGET', 5))
+
+# Route the hot read endpoints to their async views (recipes.async_views),
+# enabled by foodgram/asgi.py
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'false').lower() == 'true'
+
+# Recipes kept in every feed timeline (recipes.feed). Recipes of authors
+# with more subscribers are merged in on read instead of copied to every
+# subscriber's timeline
+FEED_LENGTH = int(os.getenv('FEED_LENGTH', 500))
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 5000))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Stateless JWT authentication (users.authentication), accepted next to
+# the DB-backed tokens while clients migrate. JWTs use the Bearer keyword,
+# tokens keep Token
+AUTH_JWT = os.getenv('AUTH_JWT', 'false').lower() == 'true'
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', 15))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_DAYS', 7))),
+    'SIGNING_KEY': os.getenv('JWT_SIGNING_KEY', SECRET_KEY),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.JWTObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.JWTRefreshSerializer',
+}
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        *(('users.authentication.StatelessJWTAuthentication',)
+          if AUTH_JWT else ()),
+        'users.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -126,6 +236,22 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
 }
 
+# Token -> user cache of users.authentication: seconds in the shared cache,
+# and size and seconds of the per-process LRU, which other processes can't
+# invalidate
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+AUTH_TOKEN_LOCAL_SIZE = int(os.getenv('AUTH_TOKEN_LOCAL_SIZE', 1024))
+AUTH_TOKEN_LOCAL_TIMEOUT = float(os.getenv('AUTH_TOKEN_LOCAL_TIMEOUT', 5))
+
+# Maximum number of ingredients returned by name search
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 50))
+
+# Text search configuration used for recipe full-text search
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', 'russian')
+
+# TrueType font with Cyrillic glyphs for PDF shopping lists
+SHOPPING_LIST_FONT = os.getenv('SHOPPING_LIST_FONT', 'DejaVuSans.ttf')
+
 # Djoser settings
 DJOSER = {
     'LOGIN_FIELD': 'email',
@@ -2,14 +2,27 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
-from recipes.views import recipe_short_link
+from recipes.views import (catalog_stats, database_stats, legacy_short_link,
+                           readiness, recipe_short_link)
 
 urlpatterns = [
+    # Links shared before short codes; codes are never only digits.
+    path('s/<int:id>/', legacy_short_link, name='recipe_legacy_short_link'),
     path('admin/', admin.site.urls),
     path('api/v1/', include(('api.v1.urls', 'v1'), namespace='v1')),
-    path('s/<int:id>/', recipe_short_link, name='recipe_short_link'),
+    path('s/<str:code>/', recipe_short_link, name='recipe_short_link'),
+    path('ready/', readiness, name='readiness'),
+    # Staff only, not proxied by nginx either.
+    path('metrics/db/', database_stats, name='database_stats'),
+    path('metrics/catalog/', catalog_stats, name='catalog_stats'),
 ]
 
+if settings.ASYNC_READ_VIEWS:
+    from recipes.async_views import short_link
+
+    # Ahead of the sync view, behind the legacy links.
+    urlpatterns.insert(1, path('s/<str:code>/', short_link))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL,
                           document_root=settings.MEDIA_ROOT)
@@ -2,7 +2,6 @@
 
 from django.contrib import admin
 from django.core.exceptions import ValidationError
-from django.db.models import Count
 from django.forms import BaseInlineFormSet
 
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
@@ -39,19 +38,9 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "author", "favorites_count")
     search_fields = ("name", "author__username", "author__email")
     list_filter = ("tags",)
+    list_select_related = ("author",)
     inlines = (RecipeIngredientInline,)
-    readonly_fields = ("favorites_count",)
-
-    def get_queryset(self, request):
-        """Add favorites count to queryset."""
-        queryset = super().get_queryset(request)
-        return queryset.annotate(favorites_count=Count("favorited_by"))
-
-    def favorites_count(self, obj):
-        """Display number of favorites."""
-        return obj.favorited_by.count()
-
-    favorites_count.short_description = "In favorites"
+    readonly_fields = ("favorites_count", "in_carts_count")
 
     def save_related(self, request, form, formsets, change):
         """Override save_related to add validation for ingredients."""
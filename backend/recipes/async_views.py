@@ -0,0 +1,259 @@
+# recipes/async_views.py
+
+"""
+Async versions of the hot read endpoints, routed ahead of the sync
+views when ASYNC_READ_VIEWS is on (the ASGI deployment). Requests they
+don't cover are handed to the sync views in a worker thread.
+"""
+
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from users.authentication import get_cached, get_jwt_user, get_token
+from users.pagination import RecipePagination
+
+from . import catalog, payloads, short_links
+from .cache import INGREDIENTS_VERSION, TAGS_VERSION
+from .conditional import (catalog_validators, make_etag,
+                          recipe_list_validators, recipe_validators)
+from .filters import RecipeFilter
+from .search import get_ingredient_index
+from .views import (IngredientViewSet, RecipeViewSet, TagViewSet,
+                    recipe_short_link, short_link_redirect)
+
+SAFE_METHODS = ("GET", "HEAD")
+RECIPE_LIST_PARAMS = ("page", "limit", "tags", "author", "search")
+
+
+def with_fallback(sync_view):
+    """
+    Decorate an async view that returns None for requests it doesn't
+    handle; those are passed to sync_view.
+    """
+    fallback = sync_to_async(sync_view)
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            response = await view(request, *args, **kwargs)
+            if response is None:
+                response = await fallback(request, *args, **kwargs)
+            return response
+
+        # csrf_exempt() wraps async views in a sync function on Django 4.2.
+        wrapper.csrf_exempt = getattr(sync_view, "csrf_exempt", False)
+        return wrapper
+
+    return decorator
+
+
+def json_request(request, params=()):
+    """Safe requests for JSON that only carry the given query params."""
+    return (request.method in SAFE_METHODS
+            and "text/html" not in request.headers.get("Accept", "")
+            and set(request.GET) <= set(params))
+
+
+async def authenticate(request):
+    """
+    CachedTokenAuthentication (and StatelessJWTAuthentication in JWT
+    mode) for async views: the per-process token cache is read in place,
+    the rest goes to a worker thread. Returns False when the header is
+    not a well-formed valid token, so the sync view reports the error.
+    """
+    header = request.headers.get("Authorization", "").split()
+    keyword = header[0].lower() if header else None
+    if keyword == "bearer" and settings.AUTH_JWT:
+        if len(header) != 2:
+            return False
+        user = await sync_to_async(get_jwt_user)(header[1])
+        if user is None:
+            return False
+        request.user = user
+        return True
+    if keyword != "token":
+        request.user = AnonymousUser()
+        return True
+    if len(header) != 2:
+        return False
+    found = get_cached(header[1]) or await sync_to_async(get_token)(
+        header[1])
+    if found is None or not found[0].is_active:
+        return False
+    request.user = found[0]
+    return True
+
+
+def json_response(data):
+    response = HttpResponse(
+        JSONRenderer().render(data), content_type="application/json")
+    patch_vary_headers(response, ("Accept",))
+    return response
+
+
+async def respond(request, validators, render, **kwargs):
+    """
+    Async counterpart of conditional(): answer 304 from the validators,
+    otherwise render and attach the same ETag and Last-Modified.
+    """
+    found = await sync_to_async(validators)(request, **kwargs)
+    etag = last_modified = None
+    response = None
+    if found is not None:
+        etag = quote_etag(make_etag(request, "json", found[0]))
+        last_modified = found[1] and int(found[1].timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await render()
+        if response is None:
+            return None
+    if last_modified and not response.has_header("Last-Modified"):
+        response["Last-Modified"] = http_date(last_modified)
+    if etag:
+        response.headers.setdefault("ETag", etag)
+    patch_vary_headers(response, ("Authorization", "Cookie"))
+    return response
+
+
+@with_fallback(TagViewSet.as_view({"get": "list"}))
+async def tag_list(request):
+    if not json_request(request) or not await authenticate(request):
+        return None
+
+    async def render():
+        return await sync_to_async(catalog.response)(request, "tags")
+
+    return await respond(request, catalog_validators(TAGS_VERSION), render)
+
+
+@with_fallback(IngredientViewSet.as_view({"get": "list"}))
+async def ingredient_list(request):
+    if not json_request(request, ("name",)) or not await authenticate(
+            request):
+        return None
+    name = request.GET.get("name")
+    if name == "":
+        return None
+
+    async def render():
+        if name is None:
+            return await sync_to_async(catalog.response)(
+                request, "ingredients")
+        index = await sync_to_async(get_ingredient_index)()
+        return json_response(index.search(name))
+
+    return await respond(
+        request, catalog_validators(INGREDIENTS_VERSION), render)
+
+
+def page_number(request):
+    value = request.GET.get("page", "1")
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def page_size(request):
+    """RecipePagination.get_page_size() for a plain HttpRequest."""
+    pagination = RecipePagination
+    try:
+        size = int(request.GET[pagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return pagination.page_size
+    if size <= 0:
+        return pagination.page_size
+    return min(size, pagination.max_page_size)
+
+
+def filter_recipes(request):
+    """Apply RecipeFilter, or return None if the params are invalid."""
+    filterset = RecipeFilter(
+        request.GET, queryset=payloads.page_queryset(), request=request)
+    if not filterset.is_valid():
+        return None
+    return filterset.qs
+
+
+def page_links(request, number, pages):
+    url = request.build_absolute_uri()
+    following = (replace_query_param(url, "page", number + 1)
+                 if number < pages else None)
+    if number == 1:
+        previous = None
+    elif number == 2:
+        previous = remove_query_param(url, "page")
+    else:
+        previous = replace_query_param(url, "page", number - 1)
+    return following, previous
+
+
+@with_fallback(RecipeViewSet.as_view({"get": "list", "post": "create"}))
+async def recipe_list(request):
+    """
+    Page number listing of recipes. Keyset pages and the per-user
+    filters are left to the sync view.
+    """
+    number = page_number(request)
+    if (number is None
+            or not json_request(request, RECIPE_LIST_PARAMS)
+            or not await authenticate(request)):
+        return None
+
+    async def render():
+        queryset = await sync_to_async(filter_recipes)(request)
+        if queryset is None:
+            return None
+        size = page_size(request)
+        count = await queryset.acount()
+        pages = max(1, math.ceil(count / size))
+        if number > pages:
+            # The sync view reports the invalid page.
+            return None
+        start = (number - 1) * size
+        recipes = [recipe async for recipe in queryset[start:start + size]]
+        results = await sync_to_async(payloads.build)(recipes, request)
+        following, previous = page_links(request, number, pages)
+        return json_response({
+            "count": count,
+            "next": following,
+            "previous": previous,
+            "results": results,
+        })
+
+    return await respond(request, recipe_list_validators, render)
+
+
+@with_fallback(RecipeViewSet.as_view({
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}))
+async def recipe_detail(request, pk):
+    if not json_request(request) or not await authenticate(request):
+        return None
+
+    async def render():
+        recipe = await payloads.page_queryset().filter(pk=pk).afirst()
+        if recipe is None:
+            # The sync view answers 404.
+            return None
+        result = await sync_to_async(payloads.build)([recipe], request)
+        return json_response(result[0])
+
+    return await respond(request, recipe_validators, render, pk=pk)
+
+
+@with_fallback(recipe_short_link)
+async def short_link(request, code):
+    if request.method not in SAFE_METHODS:
+        return None
+    return short_link_redirect(
+        await sync_to_async(short_links.resolve)(code))
@@ -0,0 +1,149 @@
+# recipes/boot.py
+
+import hashlib
+import os
+from contextlib import contextmanager
+from functools import cache
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib.staticfiles import finders
+from django.db import DatabaseError, connection
+from django.db.migrations.loader import MigrationLoader
+
+from .models import BootStep
+
+MIGRATIONS = "migrations"
+STATIC = "static"
+CATALOG = "catalog"
+
+# Written next to the copied static files, which may outlive the database.
+STATIC_MARKER = ".boot-fingerprint"
+STATIC_IGNORE_PATTERNS = ["CVS", ".*", "*~"]
+
+# Key of the PostgreSQL advisory lock held during one-time boot work.
+BOOT_LOCK_ID = 0x666F6F64
+
+
+def fingerprint(parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@cache
+def migrations_fingerprint():
+    """Hash of the migration files of every installed app."""
+
+    def parts():
+        for app_config in apps.get_app_configs():
+            module_name, _ = MigrationLoader.migrations_module(
+                app_config.label)
+            try:
+                module = import_module(module_name)
+            except ImportError:
+                continue
+            for directory in getattr(module, "__path__", []):
+                for path in sorted(Path(directory).glob("*.py")):
+                    yield f"{app_config.label}/{path.name}"
+                    yield path.read_bytes()
+
+    return fingerprint(parts())
+
+
+def static_fingerprint():
+    """
+    Paths, sizes and modification times of the files collectstatic
+    would copy. Stat calls only, so it stays cheap on every boot.
+    """
+
+    def parts():
+        seen = set()
+        for finder in finders.get_finders():
+            for path, storage in finder.list(STATIC_IGNORE_PATTERNS):
+                if path in seen:
+                    # The first finder wins, as in collectstatic.
+                    continue
+                seen.add(path)
+                stat = os.stat(storage.path(path))
+                yield f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    return fingerprint(sorted(parts()))
+
+
+def files_fingerprint(paths):
+    return fingerprint(
+        part
+        for path in paths
+        for part in (str(path), path.read_bytes())
+    )
+
+
+def read_static_marker(target):
+    try:
+        return (Path(target) / STATIC_MARKER).read_text().strip()
+    except OSError:
+        return None
+
+
+def write_static_marker(target, value):
+    (Path(target) / STATIC_MARKER).write_text(value)
+
+
+def get_step(name):
+    """Return the recorded fingerprint of a step, None on a fresh database."""
+    try:
+        return (
+            BootStep.objects.filter(name=name)
+            .values_list("fingerprint", flat=True)
+            .first()
+        )
+    except DatabaseError:
+        # The table is created by the migrations step.
+        return None
+
+
+def record_step(name, value, duration):
+    BootStep.objects.update_or_create(
+        name=name, defaults={"fingerprint": value, "duration": duration})
+
+
+@contextmanager
+def boot_lock():
+    """
+    Serialize one-time boot work across replicas with a PostgreSQL
+    session advisory lock. Other databases run without a lock.
+    """
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [BOOT_LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [BOOT_LOCK_ID])
+
+
+_ready = False
+
+
+def is_ready():
+    """
+    Check that the database answers and its schema was migrated for
+    this code. Once true, only the database check is repeated.
+    """
+    global _ready
+    try:
+        if not _ready:
+            _ready = get_step(MIGRATIONS) == migrations_fingerprint()
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+    except DatabaseError:
+        return False
+    return _ready
@@ -0,0 +1,90 @@
+# recipes/cache.py
+
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone as django_timezone
+
+from .models import Tag
+
+TAG_SLUG_MAP_KEY = "recipes:tag_slug_map"
+VERSION_KEY = "recipes:version:{}"
+
+INGREDIENTS_VERSION = "ingredients"
+TAGS_VERSION = "tags"
+RECIPES_VERSION = "recipes"
+
+
+def user_version_name(user_id):
+    """Version of a user's favorites, cart and subscriptions."""
+    return f"user:{user_id}"
+
+
+def new_version():
+    # The issue time leads the token, so it doubles as a
+    # modification stamp for Last-Modified.
+    return f"{time.time_ns():x}.{uuid4().hex[:12]}"
+
+
+def version_time(token):
+    """Return when a version token was issued, or None if unknown."""
+    stamp, dot, _ = token.partition(".")
+    if not dot:
+        return None
+    try:
+        return datetime.fromtimestamp(int(stamp, 16) / 1e9, tz=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def get_version(name):
+    """Return the current version token of a cached data set."""
+    return cache.get_or_set(
+        VERSION_KEY.format(name), new_version, timeout=None)
+
+
+def get_versions(names):
+    """Return {name: version token} in a single cache round trip."""
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in found}
+    if missing:
+        # add() keeps a token another worker has just set.
+        for key, token in missing.items():
+            if not cache.add(key, token, timeout=None):
+                missing[key] = cache.get(key, token)
+        found.update(missing)
+    return {keys[key]: token for key, token in found.items()}
+
+
+def bump_version(name):
+    """Invalidate everything derived from a data set."""
+    key = VERSION_KEY.format(name)
+    cache.set(key, new_version(), timeout=None)
+    # Bump again on commit: anything derived from the old rows while
+    # the transaction was open must not keep the current version.
+    transaction.on_commit(
+        lambda: cache.set(key, new_version(), timeout=None))
+
+
+def touch_recipes(queryset):
+    """Mark recipes as modified for conditional requests."""
+    queryset.update(updated_at=django_timezone.now())
+    bump_version(RECIPES_VERSION)
+
+
+def get_tag_slug_map():
+    """Return a cached mapping of tag slug to tag id."""
+    return cache.get_or_set(
+        TAG_SLUG_MAP_KEY,
+        lambda: dict(Tag.objects.values_list("slug", "id")),
+        timeout=None,
+    )
+
+
+def invalidate_tag_slug_map():
+    """Drop the cached slug map so the next lookup rebuilds it."""
+    cache.delete(TAG_SLUG_MAP_KEY)
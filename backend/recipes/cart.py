@@ -0,0 +1,107 @@
+# recipes/cart.py
+
+from collections import Counter
+
+from django.db.models import F, Sum
+
+from .models import CartIngredient, RecipeIngredient, ShoppingCart
+
+
+def recipe_amounts(recipe_id):
+    """Return {ingredient_id: amount} for a recipe."""
+    return Counter(dict(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .values_list("ingredient_id", "amount")
+    ))
+
+
+def apply_deltas(user_ids, deltas):
+    """
+    Shift the cart totals of every given user by the same per-ingredient
+    deltas. Totals are changed with F() expressions, so concurrent cart
+    updates of the same user don't overwrite each other.
+    """
+    user_ids = list(user_ids)
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+
+    CartIngredient.objects.bulk_create(
+        [
+            CartIngredient(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0
+        ],
+        ignore_conflicts=True,
+    )
+    for ingredient_id, delta in deltas.items():
+        CartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id=ingredient_id
+        ).update(total_amount=F("total_amount") + delta)
+    CartIngredient.objects.filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas,
+        total_amount__lte=0,
+    ).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    """Add a recipe's ingredients to the user's cart totals."""
+    apply_deltas([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    """Subtract a recipe's ingredients from the user's cart totals."""
+    apply_deltas([user_id], {
+        pk: -amount for pk, amount in recipe_amounts(recipe_id).items()})
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Apply a change of recipe ingredients to every cart holding it."""
+    deltas = Counter(new_amounts)
+    deltas.subtract(old_amounts)
+    apply_deltas(
+        ShoppingCart.objects.filter(recipe_id=recipe_id)
+        .values_list("user_id", flat=True),
+        deltas,
+    )
+
+
+def actual_totals(user_ids=None):
+    """Compute cart totals from scratch as {(user_id, ingredient_id): sum}."""
+    rows = ShoppingCart.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in rows.values_list(
+            "user_id", "recipe__recipe_ingredients__ingredient_id"
+        ).annotate(
+            total=Sum("recipe__recipe_ingredients__amount")
+        ).order_by()
+        if ingredient_id is not None
+    }
+
+
+def stored_totals(user_ids=None):
+    """Return stored cart totals as {(user_id, ingredient_id): total}."""
+    rows = CartIngredient.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in rows.values_list(
+            "user_id", "ingredient_id", "total_amount")
+    }
+
+
+def rebuild(user_ids):
+    """Replace the stored cart totals of the given users."""
+    CartIngredient.objects.filter(user_id__in=user_ids).delete()
+    CartIngredient.objects.bulk_create(
+        CartIngredient(
+            user_id=user_id, ingredient_id=ingredient_id, total_amount=total)
+        for (user_id, ingredient_id), total in actual_totals(
+            user_ids).items()
+    )
@@ -0,0 +1,124 @@
+# recipes/catalog.py
+
+import gzip
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from .cache import INGREDIENTS_VERSION, TAGS_VERSION, get_version
+from .models import Ingredient, Tag
+from .serializers import IngredientSerializer, TagSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAYLOAD_KEY = "recipes:catalog:{}:{}:{}"
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+# name: (version, queryset, serializer)
+CATALOGS = {
+    "tags": (TAGS_VERSION, Tag.objects.all, TagSerializer),
+    "ingredients": (
+        INGREDIENTS_VERSION, Ingredient.objects.all, IngredientSerializer),
+}
+
+ENCODERS = {
+    "identity": lambda content: content,
+    "gzip": lambda content: gzip.compress(content, compresslevel=9),
+}
+if brotli is not None:
+    ENCODERS["br"] = lambda content: brotli.compress(content, quality=11)
+
+# Best first.
+PREFERENCE = ("br", "gzip", "identity")
+
+
+def servable(request):
+    """Only the unfiltered JSON list is pre-rendered."""
+    return (not request.query_params
+            and type(request.accepted_renderer) is JSONRenderer)
+
+
+def negotiate(request):
+    """Pick the best encoding the client accepts."""
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in PREFERENCE:
+        if coding in ENCODERS and accepted.get(
+                coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+def render(name):
+    """Render a catalog once and keep every encoding of it."""
+    _, queryset, serializer_class = CATALOGS[name]
+    content = JSONRenderer().render(
+        serializer_class(queryset(), many=True).data)
+    return {coding: encode(content) for coding, encode in ENCODERS.items()}
+
+
+# (catalog, "hit" | "miss") -> count in this process, see stats().
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def record(name, outcome):
+    with _counts_lock:
+        _counts[name, outcome] += 1
+
+
+def get_payload(name, coding):
+    """
+    Return (body, hit) for a catalog in the given encoding. Keys carry
+    the catalog version, so Tag/Ingredient changes miss automatically.
+    """
+    version = get_version(CATALOGS[name][0])
+    key = PAYLOAD_KEY.format(name, version, coding)
+    body = cache.get(key)
+    if body is not None:
+        record(name, "hit")
+        return body, True
+    record(name, "miss")
+    payloads = render(name)
+    cache.set_many({
+        PAYLOAD_KEY.format(name, version, other): payload
+        for other, payload in payloads.items()
+    }, timeout=PAYLOAD_TIMEOUT)
+    return payloads[coding], False
+
+
+def response(request, name):
+    """Serve a pre-rendered catalog, compressed if the client allows."""
+    coding = negotiate(request)
+    body, hit = get_payload(name, coding)
+    result = HttpResponse(body, content_type="application/json")
+    if coding != "identity":
+        result["Content-Encoding"] = coding
+    result["X-Cache"] = "HIT" if hit else "MISS"
+    patch_vary_headers(result, ("Accept", "Accept-Encoding"))
+    return result
+
+
+def stats():
+    """Return {catalog: (hits, misses)} of this process since it started."""
+    with _counts_lock:
+        return {
+            name: (_counts[name, "hit"], _counts[name, "miss"])
+            for name in CATALOGS
+        }
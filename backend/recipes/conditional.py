@@ -0,0 +1,98 @@
+# recipes/conditional.py
+
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from .cache import (INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION,
+                    get_versions, user_version_name, version_time)
+from .models import Recipe
+
+
+def make_etag(request, renderer_format, values):
+    user = request.user
+    parts = (
+        request.get_full_path(),
+        renderer_format,
+        user.pk if user.is_authenticated else "",
+        *values,
+    )
+    return hashlib.md5(
+        "|".join(map(str, parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def conditional(validators, name=""):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view
+    runs. validators(request, **kwargs) returns the values the response
+    depends on and its last modification time, or None to let the view
+    handle the request as usual (e.g. to return 404). Works like
+    method_decorator, so name decorates an inherited method.
+    """
+
+    def state(request, kwargs):
+        if not hasattr(request, "_validators"):
+            request._validators = validators(request, **kwargs)
+        return request._validators
+
+    def etag(request, *args, **kwargs):
+        found = state(request, kwargs)
+        if found is None:
+            return None
+        return make_etag(request, request.accepted_renderer.format, found[0])
+
+    def last_modified(request, *args, **kwargs):
+        found = state(request, kwargs)
+        return found and found[1]
+
+    return method_decorator([
+        vary_on_headers("Authorization", "Cookie"),
+        condition(etag_func=etag, last_modified_func=last_modified),
+    ], name=name)
+
+
+def latest(stamps):
+    stamps = list(stamps)
+    if None in stamps:
+        return None
+    return max(stamps)
+
+
+def versions_state(request, names):
+    if request.user.is_authenticated:
+        names = [*names, user_version_name(request.user.pk)]
+    versions = list(get_versions(names).values())
+    return versions, [version_time(version) for version in versions]
+
+
+def catalog_validators(*names):
+    """Validators of an endpoint that only depends on the given versions."""
+
+    def validators(request, **kwargs):
+        versions = list(get_versions(names).values())
+        # Full lists are served pre-compressed, one ETag per encoding.
+        encoding = request.headers.get("Accept-Encoding", "")
+        return [*versions, encoding], latest(map(version_time, versions))
+
+    return validators
+
+
+def recipe_list_validators(request, **kwargs):
+    versions, stamps = versions_state(
+        request, [RECIPES_VERSION, TAGS_VERSION, INGREDIENTS_VERSION])
+    return versions, latest(stamps)
+
+
+def recipe_validators(request, pk=None, **kwargs):
+    if not str(pk).isdigit():
+        return None
+    updated_at = Recipe.objects.filter(pk=pk).values_list(
+        "updated_at", flat=True).first()
+    if updated_at is None:
+        return None
+    versions, stamps = versions_state(
+        request, [TAGS_VERSION, INGREDIENTS_VERSION])
+    return [updated_at.isoformat(), *versions], latest([updated_at, *stamps])
@@ -0,0 +1,204 @@
+# recipes/feed.py
+
+"""
+Per-user timelines of recipes by followed authors.
+
+Recipes are copied to the timelines of the author's subscribers when
+they are created (fan-out on write). Authors with more than
+FEED_FANOUT_LIMIT subscribers are skipped, their recipes are merged
+into the feed when it is read, and copied to the timelines once the
+author falls back under the limit. Timelines keep the newest
+FEED_LENGTH entries.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from heapq import merge
+from itertools import groupby, takewhile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from users.models import Subscription
+
+from .models import FeedEntry, Recipe
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def is_popular(author_id):
+    return User.objects.filter(
+        pk=author_id, subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(recipe):
+    """Add a new recipe to the timelines of the author's subscribers."""
+    if is_popular(recipe.author_id):
+        return
+    copy_recipes(recipe.author_id, [(recipe.pk, recipe.pub_date)])
+
+
+def copy_recipes(author_id, recipes):
+    """Add (id, pub_date) recipes of an author to the subscribers' feeds."""
+    subscribers = list(Subscription.objects.filter(
+        author_id=author_id).values_list("user_id", flat=True))
+    for start in range(0, len(subscribers), BATCH_SIZE):
+        user_ids = subscribers[start:start + BATCH_SIZE]
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=user_id, recipe_id=pk, author_id=author_id,
+                          pub_date=pub_date)
+                for user_id in user_ids
+                for pk, pub_date in recipes
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        trim_many(user_ids)
+
+
+def unpopular(author_id):
+    """
+    Copy the recipes an author posted while over FEED_FANOUT_LIMIT, which
+    were merged on read, once the author is back under the limit.
+    """
+    recipes = (
+        Recipe.objects.filter(author_id=author_id)
+        .annotate(copied=Exists(
+            FeedEntry.objects.filter(recipe_id=OuterRef("pk"))))
+        .order_by("-pub_date", "-id")
+        .values_list("id", "pub_date", "copied")[:settings.FEED_LENGTH]
+    )
+    # Newest first, up to the last recipe that was fanned out.
+    missing = [
+        (pk, pub_date)
+        for pk, pub_date, _ in takewhile(lambda row: not row[2], recipes)
+    ]
+    if missing:
+        copy_recipes(author_id, missing)
+
+
+def backfill(user_id, author_ids):
+    """Copy the latest recipes of the given authors to a timeline."""
+    recipes = (
+        Recipe.objects.filter(author_id__in=author_ids)
+        .order_by("-pub_date", "-id")
+        .values_list("id", "author_id", "pub_date")[:settings.FEED_LENGTH]
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, recipe_id=pk, author_id=author_id,
+                      pub_date=pub_date)
+            for pk, author_id, pub_date in recipes
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def subscribed(user_id, author_id):
+    if not is_popular(author_id):
+        backfill(user_id, [author_id])
+
+
+def unsubscribed(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim(user_id):
+    """Delete timeline entries past the newest FEED_LENGTH."""
+    oldest_kept = (
+        FeedEntry.objects.filter(user_id=user_id)
+        .order_by("-pub_date", "-recipe_id")
+        .values_list("pub_date", "recipe_id")
+        [settings.FEED_LENGTH - 1:settings.FEED_LENGTH]
+        .first()
+    )
+    if oldest_kept is None:
+        return 0
+    pub_date, recipe_id = oldest_kept
+    deleted, _ = FeedEntry.objects.filter(
+        Q(pub_date__lt=pub_date)
+        | Q(pub_date=pub_date, recipe_id__lt=recipe_id),
+        user_id=user_id,
+    ).delete()
+    return deleted
+
+
+def trim_many(user_ids):
+    """Cut several timelines down to FEED_LENGTH entries in one query."""
+    past_length = (
+        FeedEntry.objects.filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F("user_id"),
+            order_by=(F("pub_date").desc(), F("recipe_id").desc()),
+        ))
+        .filter(position__gt=settings.FEED_LENGTH)
+        .values("id")
+    )
+    deleted, _ = FeedEntry.objects.filter(id__in=past_length).delete()
+    return deleted
+
+
+def encode_cursor(key):
+    pub_date, pk = key
+    return base64.urlsafe_b64encode(
+        f"{pub_date.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the (pub_date, id) key of a cursor, None if it's invalid."""
+    try:
+        pub_date, pk = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (ValueError, binascii.Error):
+        return None
+
+
+def before(key, date_field, pk_field):
+    """Rows older than a (pub_date, id) key, newest first ordering."""
+    if key is None:
+        return Q()
+    pub_date, pk = key
+    return Q(**{f"{date_field}__lt": pub_date}) | Q(
+        **{date_field: pub_date, f"{pk_field}__lt": pk})
+
+
+def page(user_id, size, after=None):
+    """
+    Return the recipe ids of one feed page after a cursor key, and the
+    key of the next page or None. The timeline and the recipes of the
+    popular followed authors are read newest first and merged.
+    """
+    timeline = (
+        FeedEntry.objects.filter(
+            before(after, "pub_date", "recipe_id"), user_id=user_id)
+        .order_by("-pub_date", "-recipe_id")
+        .values_list("pub_date", "recipe_id")[:size + 1]
+    )
+    popular = list(
+        User.objects.filter(
+            subscribing__user_id=user_id,
+            subscribers_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list("id", flat=True)
+    )
+    sources = [list(timeline)]
+    if popular:
+        sources.append(list(
+            Recipe.objects.filter(
+                before(after, "pub_date", "id"), author_id__in=popular)
+            .order_by("-pub_date", "-id")
+            .values_list("pub_date", "id")[:size + 1]
+        ))
+    # Recipes written before their author became popular are in both.
+    keys = [key for key, _ in groupby(merge(*sources, reverse=True))]
+    return [pk for _, pk in keys[:size]], (
+        keys[size - 1] if len(keys) > size else None)
@@ -0,0 +1,27 @@
+# recipes/fields.py
+
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from . import uploads
+
+
+class UploadImageField(Base64ImageField):
+    """
+    Image field accepting a multipart file, an "upload:<token>" from the
+    chunked upload endpoint or, as before, a base64 string.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith(uploads.TOKEN_PREFIX):
+            request = self.context.get("request")
+            if request is None or not request.user.is_authenticated:
+                self.fail("invalid")
+            try:
+                data = uploads.open_upload(data, request.user)
+            except uploads.UploadError as error:
+                raise serializers.ValidationError(str(error))
+        if isinstance(data, UploadedFile):
+            return serializers.ImageField.to_internal_value(self, data)
+        return super().to_internal_value(data)
@@ -1,8 +1,18 @@
 # recipes/filters.py
 
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from users.pagination import RecipeCursorPagination
 
-from .models import Ingredient, Recipe
+from .cache import get_tag_slug_map
+from .models import Favorite, Ingredient, Recipe, ShoppingCart
+from .search import get_recipe_search
+
+
+def tag_choices():
+    """Build tag filter choices from the cached slug map."""
+    return [(slug, slug) for slug in get_tag_slug_map()]
 
 
 class IngredientFilter(filters.FilterSet):
@@ -18,26 +28,58 @@ class IngredientFilter(filters.FilterSet):
 class RecipeFilter(filters.FilterSet):
     """Filter for recipes."""
 
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method="get_tags")
     is_favorited = filters.BooleanFilter(method="get_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="get_is_in_shopping_cart")
     author = filters.NumberFilter(field_name="author__id")
+    search = filters.CharFilter(method="get_search")
 
     class Meta:
         model = Recipe
-        fields = ("tags", "author", "is_favorited", "is_in_shopping_cart")
+        fields = (
+            "tags", "author", "is_favorited", "is_in_shopping_cart", "search")
+
+    def get_tags(self, queryset, name, value):
+        """Filter recipes having any of the given tags."""
+        slug_map = get_tag_slug_map()
+        tag_ids = [slug_map[slug] for slug in value if slug in slug_map]
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef("pk"), tag_id__in=tag_ids)
+            )
+        )
+
+    def get_search(self, queryset, name, value):
+        """
+        Full-text search by name and description, best match first.
+        Cursor pages are ordered by date, so they can't keep the ranking.
+        """
+        if RecipeCursorPagination.cursor_query_param in self.request.GET:
+            raise ValidationError({
+                "search": "Search results can't be paged with a cursor, "
+                          "use page and limit."
+            })
+        return get_recipe_search().filter(queryset, value)
 
     def get_is_favorited(self, queryset, name, value):
         """Filter recipes by favorites."""
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favorited_by__user=user)
+            return queryset.filter(
+                Exists(Favorite.objects.filter(
+                    user_id=user.pk, recipe=OuterRef("pk")))
+            )
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         """Filter recipes by shopping cart."""
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(in_shopping_cart__user=user)
+            return queryset.filter(
+                Exists(ShoppingCart.objects.filter(
+                    user_id=user.pk, recipe=OuterRef("pk")))
+            )
         return queryset
@@ -0,0 +1,58 @@
+# recipes/image_variants.py
+"""
+Image variant rendering.
+
+This module only depends on Pillow so it can run inside worker
+processes that never set up Django.
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def variant_name(name, variant, fmt):
+    """Storage name of a variant: <dir>/variants/<stem>_<variant>.<ext>."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(
+        directory, "variants", f"{stem}_{variant}.{EXTENSIONS[fmt]}")
+
+
+def render_variants(source_path, media_root, name, sizes):
+    """
+    Render every size in WebP and JPEG from the image at source_path.
+
+    Orientation from EXIF is applied, then EXIF, ICC and other metadata
+    are dropped. Returns {variant: {format: storage name}}.
+    """
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ("RGBA", "LA", "PA") or (
+            original.mode == "P" and "transparency" in original.info)
+        pixels = original.convert("RGBA" if has_alpha else "RGB")
+    pixels.info = {}
+
+    variants = {}
+    for variant, size in sizes.items():
+        resized = pixels.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+
+        variants[variant] = {}
+        for fmt, (pil_format, options) in FORMATS.items():
+            image = resized
+            if pil_format == "JPEG" and image.mode != "RGB":
+                image = Image.new("RGB", image.size, (255, 255, 255))
+                image.paste(resized, mask=resized.getchannel("A"))
+            target_name = variant_name(name, variant, fmt)
+            target_path = os.path.join(media_root, target_name)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            image.save(target_path, pil_format, **options)
+            variants[variant][fmt] = target_name
+    return variants
@@ -0,0 +1,144 @@
+# recipes/images.py
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+from .image_variants import render_variants
+
+logger = logging.getLogger(__name__)
+
+# Sent with sender=model and pk once new variants are stored.
+variants_saved = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the worker-wide process pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _executor
+
+
+def variants_ready(field_file, variants):
+    """Check that variants were rendered from the current file."""
+    return bool(field_file) and variants.get("source") == field_file.name
+
+
+def schedule_variants(instance, field, variants_field):
+    """
+    Render variants of instance.<field> once the transaction commits,
+    unless they already match the current file.
+    """
+    field_file = getattr(instance, field)
+    if not field_file or variants_ready(
+            field_file, getattr(instance, variants_field)):
+        return
+    model, pk, name = type(instance), instance.pk, field_file.name
+    transaction.on_commit(
+        lambda: process_variants(model, pk, field, variants_field, name))
+
+
+def process_variants(model, pk, field, variants_field, name):
+    args = (
+        default_storage.path(name),
+        str(settings.MEDIA_ROOT),
+        name,
+        settings.IMAGE_VARIANTS,
+    )
+    if not settings.IMAGE_PROCESSING_WORKERS:
+        save_variants(
+            model, pk, field, variants_field, name, render_variants(*args))
+        return
+
+    def done(future):
+        try:
+            save_variants(
+                model, pk, field, variants_field, name, future.result())
+        except Exception:
+            logger.exception("Failed to process image %s", name)
+        finally:
+            # The callback thread outlives requests, so don't keep
+            # its connection open.
+            connection.close()
+
+    get_executor().submit(render_variants, *args).add_done_callback(done)
+
+
+def variant_paths(variants):
+    return {
+        path
+        for formats in variants.values() if isinstance(formats, dict)
+        for path in formats.values()
+    }
+
+
+def delete_variants(variants):
+    """Delete the files of rendered variants."""
+    for path in variant_paths(variants):
+        default_storage.delete(path)
+
+
+def save_variants(model, pk, field, variants_field, name, rendered):
+    """
+    Store rendered variants unless the file changed in the meantime,
+    and delete the variant files that are no longer referenced.
+    """
+    previous = model.objects.filter(pk=pk).values_list(
+        variants_field, flat=True).first() or {}
+    updated = model.objects.filter(pk=pk, **{field: name}).update(
+        **{variants_field: {"source": name, **rendered}})
+    if updated:
+        keep, discard = rendered, previous
+        variants_saved.send(sender=model, pk=pk)
+    else:
+        # The file was replaced while rendering, drop this result.
+        keep, discard = previous, rendered
+    for path in variant_paths(discard) - variant_paths(keep):
+        default_storage.delete(path)
+
+
+def build_url(request, name):
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def variant_urls(request, field_file, variants):
+    """
+    Return {variant: {format: url}}. Until rendering has finished the
+    original file stands in for every variant.
+    """
+    if not field_file:
+        return {}
+    if not variants_ready(field_file, variants):
+        original = build_url(request, field_file.name)
+        return {
+            variant: {fmt: original for fmt in ("webp", "jpeg")}
+            for variant in settings.IMAGE_VARIANTS
+        }
+    return {
+        variant: {
+            fmt: build_url(request, path) for fmt, path in formats.items()}
+        for variant, formats in variants.items()
+        if variant != "source"
+    }
+
+
+def image_url(request, field_file):
+    """URL of the uploaded original, the variants have their own field."""
+    if not field_file:
+        return None
+    return build_url(request, field_file.name)
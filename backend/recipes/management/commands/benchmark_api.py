@@ -0,0 +1,535 @@
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from PIL import Image
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from rest_framework.authtoken.models import Token
+from users.pagination import RecipePagination
+
+User = get_user_model()
+
+HOST = "127.0.0.1"
+QUERIES_HEADER = "X-Benchmark-Queries"
+
+# Runs gunicorn in the server process. Each sync worker serves one
+# request at a time, so a per-process counter reset by a WSGI wrapper
+# gives the SQL queries of every request, sent back in a header.
+SERVER = """
+import sys
+
+from django.db.backends.signals import connection_created
+
+workers, bind, header = sys.argv[1:]
+queries = 0
+
+
+def count(execute, sql, params, many, context):
+    global queries
+    queries += 1
+    return execute(sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    if count not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count)
+
+
+connection_created.connect(install, weak=False)
+
+
+def counting(app):
+    def wrapper(environ, start_response):
+        global queries
+        queries = 0
+
+        def start(status, headers, exc_info=None):
+            headers.append((header, str(queries)))
+            return start_response(status, headers, exc_info)
+
+        return app(environ, start)
+
+    return wrapper
+
+
+from gunicorn.app.wsgiapp import WSGIApplication
+
+
+class Application(WSGIApplication):
+    def load_wsgiapp(self):
+        return counting(super().load_wsgiapp())
+
+
+sys.argv = ["gunicorn", "--bind", bind, "--workers", workers,
+            "--log-level", "warning", "foodgram.wsgi:application"]
+Application("%(prog)s [OPTIONS] [APP_MODULE]").run()
+"""
+
+# Endpoints with fewer requests in either run are not compared.
+MIN_SAMPLES = 50
+
+# Relative weights of the operations each simulated client picks from.
+MIXES = {
+    "browse": {
+        "recipe list by tags": 6,
+        "recipe detail": 3,
+        "ingredient search": 1,
+    },
+    "member": {
+        "recipe list with flags": 4,
+        "favorite toggle": 2,
+        "cart toggle": 2,
+        "subscriptions": 1,
+        "shopping list": 1,
+    },
+    "full": {
+        "recipe list by tags": 6,
+        "recipe detail": 3,
+        "ingredient search": 1,
+        "recipe list with flags": 4,
+        "favorite toggle": 2,
+        "cart toggle": 2,
+        "subscriptions": 1,
+        "shopping list": 1,
+        "recipe create": 1,
+    },
+}
+
+
+async def send(port, method, path, headers=(), body=b""):
+    """Send one HTTP/1.1 request, return the status, headers and body."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", "Host: localhost",
+                 "Connection: close", *headers]
+        if body:
+            lines += ["Content-Type: application/json",
+                      f"Content-Length: {len(body)}"]
+        writer.write("\r\n".join([*lines, "", ""]).encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    fields = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+    return int(lines[0].split(" ", 2)[1]), fields, content
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+class Session:
+    """
+    One simulated client. Members keep the favorites and cart items
+    they added, so toggles alternate adding and removing.
+    """
+
+    def __init__(self, command, user, rng):
+        self.command = command
+        self.user = user
+        self.rng = rng
+        self.headers = (
+            (f"Authorization: Token {user['token']}",) if user else ())
+        self.favorites = []
+        self.cart = []
+        self.created = []
+
+    def requests(self, operation):
+        """Return (label, method, path, body, expected statuses)."""
+        data, rng = self.command.data, self.rng
+        if operation == "recipe list by tags":
+            tags = "&".join(
+                f"tags={slug}"
+                for slug in rng.sample(data["tags"], rng.randint(1, 2)))
+            return ("recipe list by tags", "GET",
+                    f"/api/v1/recipes/?{tags}&page={self.page()}",
+                    b"", (200,))
+        if operation == "recipe detail":
+            return ("recipe detail", "GET",
+                    f"/api/v1/recipes/{rng.choice(data['recipes'])}/",
+                    b"", (200,))
+        if operation == "ingredient search":
+            return ("ingredient search", "GET",
+                    f"/api/v1/ingredients/?name="
+                    f"{rng.choice(data['prefixes'])}", b"", (200,))
+        if operation == "recipe list with flags":
+            # Few recipes are flagged, the filtered lists stay on page 1.
+            query = rng.choice((f"page={self.page()}", "is_favorited=1",
+                                "is_in_shopping_cart=1"))
+            return ("recipe list with flags", "GET",
+                    f"/api/v1/recipes/?{query}", b"", (200,))
+        if operation == "favorite toggle":
+            return self.toggle("favorite", self.favorites)
+        if operation == "cart toggle":
+            return self.toggle("shopping_cart", self.cart)
+        if operation == "subscriptions":
+            return ("subscriptions", "GET",
+                    "/api/v1/users/subscriptions/?recipes_limit=3",
+                    b"", (200,))
+        if operation == "shopping list":
+            return ("shopping list", "GET",
+                    "/api/v1/recipes/download_shopping_cart/", b"",
+                    (200, 400))
+        if operation == "recipe create":
+            return ("recipe create", "POST", "/api/v1/recipes/",
+                    self.command.recipe_body(rng), (201,))
+        raise CommandError(f"Unknown operation {operation}.")
+
+    def page(self):
+        return self.rng.randint(1, self.command.data["pages"])
+
+    def toggle(self, action, added):
+        if added and self.rng.random() < 0.5:
+            pk = added.pop(self.rng.randrange(len(added)))
+            return (f"{action} remove", "DELETE",
+                    f"/api/v1/recipes/{pk}/{action}/", b"", (204,))
+        candidates = self.user[f"{action}_candidates"]
+        if not candidates:
+            return self.requests("recipe detail")
+        pk = candidates.pop()
+        added.append(pk)
+        return (f"{action} add", "POST",
+                f"/api/v1/recipes/{pk}/{action}/", b"", (201,))
+
+    def cleanup(self):
+        """Requests undoing what the session added, not measured."""
+        for pk in self.favorites:
+            yield "DELETE", f"/api/v1/recipes/{pk}/favorite/"
+        for pk in self.cart:
+            yield "DELETE", f"/api/v1/recipes/{pk}/shopping_cart/"
+        for pk in self.created:
+            yield "DELETE", f"/api/v1/recipes/{pk}/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the API with a realistic traffic mix against a "
+        "seeded database and report throughput, p50/p95/p99 latency and "
+        "SQL queries per request for each endpoint. Results can be saved "
+        "and compared with an earlier run to flag regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mix", choices=MIXES, default="full")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=30)
+        parser.add_argument("--warmup", type=float, default=3)
+        parser.add_argument("--workers", type=int, default=2,
+                            help="Gunicorn sync workers.")
+        parser.add_argument("--members", type=int, default=50,
+                            help="Share of authenticated clients in the "
+                                 "full mix, in percent.")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--save", help="Write the results as JSON.")
+        parser.add_argument(
+            "--compare", nargs="+", metavar="RESULTS",
+            help="Compare this run with saved results, or two saved "
+                 "results without running.")
+        parser.add_argument("--threshold", type=float, default=10,
+                            help="Regression threshold in percent.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        compare = options["compare"] or []
+        if len(compare) > 2:
+            raise CommandError("--compare takes one or two result files.")
+        if len(compare) == 2:
+            baseline, results = (self.read(path) for path in compare)
+        else:
+            baseline = self.read(compare[0]) if compare else None
+            results = self.run()
+            self.show(results)
+            if options["save"]:
+                Path(options["save"]).write_text(
+                    json.dumps(results, indent=2, ensure_ascii=False))
+        if baseline is not None:
+            regressions = self.compare(baseline, results)
+            if regressions:
+                raise CommandError(f"{regressions} regression(s) found.")
+
+    def read(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Can't read results {path}: {error}")
+
+    def run(self):
+        options = self.options
+        self.random = random.Random(options["seed"])
+        if not Recipe.objects.exists():
+            self.stdout.write("Empty database, generating data")
+            call_command("generate_data", users=200, recipes=2000,
+                         seed=options["seed"], verbosity=0)
+        sessions, created_tokens = self.prepare()
+        server = self.start()
+        try:
+            if options["warmup"]:
+                asyncio.run(self.load(sessions, options["warmup"]))
+            samples, elapsed = asyncio.run(
+                self.load(sessions, options["duration"]))
+            asyncio.run(self.cleanup(sessions))
+        finally:
+            self.stop(server)
+            Token.objects.filter(key__in=created_tokens).delete()
+        return {
+            "meta": {
+                "mix": options["mix"],
+                "concurrency": options["concurrency"],
+                "duration": round(elapsed, 2),
+                "workers": options["workers"],
+                "recipes": Recipe.objects.count(),
+                "users": User.objects.count(),
+                "database": settings.DATABASES["default"]["ENGINE"],
+            },
+            "endpoints": {
+                label: self.summarize(values, elapsed)
+                for label, values in sorted(samples.items())
+            },
+        }
+
+    def prepare(self):
+        """Pick users, recipes and tokens, return the client sessions."""
+        options = self.options
+        recipes = list(Recipe.objects.values_list("id", flat=True)[:5000])
+        tags = list(Tag.objects.values_list("slug", flat=True))
+        if not recipes or not tags:
+            raise CommandError("No recipes or tags, populate the database.")
+        names = Ingredient.objects.values_list("name", flat=True)[:200]
+        self.data = {
+            "recipes": recipes,
+            "tags": tags,
+            "tag_ids": list(Tag.objects.values_list("id", flat=True)),
+            # Pages that exist even in the lists filtered by one tag.
+            "pages": max(1, min(5, Recipe.objects.count() // (
+                RecipePagination.page_size * len(tags)))),
+            "prefixes": sorted({name[:3] for name in names}),
+            "ingredients": list(
+                Ingredient.objects.values_list("id", flat=True)[:200]),
+        }
+        self.image = self.make_image()
+
+        mix = MIXES[options["mix"]]
+        members = 0 if options["mix"] == "browse" else (
+            options["concurrency"] if options["mix"] == "member"
+            else round(options["concurrency"] * options["members"] / 100))
+        # Users with a cart first, an empty cart answers 400.
+        users = list(
+            User.objects.filter(is_active=True)
+            .annotate(has_cart=Exists(
+                ShoppingCart.objects.filter(user=OuterRef("pk"))))
+            .order_by("-has_cart", "id")[:members])
+        if len(users) < members:
+            raise CommandError(
+                f"{members} active users needed, {len(users)} found.")
+        created_tokens = []
+        sessions = []
+        for index in range(options["concurrency"]):
+            rng = random.Random(f"{options['seed']}:{index}")
+            user = None
+            if index < members:
+                token, created = Token.objects.get_or_create(
+                    user=users[index])
+                if created:
+                    created_tokens.append(token.key)
+                user = {
+                    "token": token.key,
+                    **{
+                        f"{action}_candidates": self.candidates(
+                            model, users[index], rng)
+                        for action, model in (("favorite", Favorite),
+                                              ("shopping_cart", ShoppingCart))
+                    },
+                }
+            session = Session(self, user, rng)
+            session.operations = [
+                name for name in mix
+                if user is not None or not self.needs_user(name)
+            ]
+            session.weights = [mix[name] for name in session.operations]
+            sessions.append(session)
+        return sessions, created_tokens
+
+    @staticmethod
+    def needs_user(operation):
+        return operation in MIXES["member"] or operation == "recipe create"
+
+    def candidates(self, model, user, rng):
+        """Recipes the user can add, so every add answers 201."""
+        taken = set(model.objects.filter(user=user)
+                    .values_list("recipe_id", flat=True))
+        pool = [pk for pk in self.data["recipes"] if pk not in taken]
+        rng.shuffle(pool)
+        return pool[:1000]
+
+    def make_image(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), (200, 120, 60)).save(
+            buffer, "JPEG", quality=85)
+        return "data:image/jpeg;base64," + base64.b64encode(
+            buffer.getvalue()).decode()
+
+    def recipe_body(self, rng):
+        ingredients = rng.sample(self.data["ingredients"], 3)
+        return json.dumps({
+            "name": f"Benchmark {rng.randrange(10 ** 6)}",
+            "text": "Created by benchmark_api.",
+            "cooking_time": rng.randint(5, 120),
+            "image": self.image,
+            "tags": rng.sample(self.data["tag_ids"], 1),
+            "ingredients": [
+                {"id": pk, "amount": rng.randint(1, 500)}
+                for pk in ingredients
+            ],
+        }).encode()
+
+    def start(self):
+        argv = [sys.executable, "-c", SERVER, str(self.options["workers"]),
+                f"{HOST}:{self.options['port']}", QUERIES_HEADER]
+        env = {**os.environ, "ASYNC_READ_VIEWS": "false"}
+        server = subprocess.Popen(argv, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                asyncio.run(send(self.options["port"], "GET",
+                                 "/api/v1/tags/"))
+                return server
+            except OSError:
+                time.sleep(0.2)
+        self.stop(server)
+        raise CommandError("Server did not start.")
+
+    def stop(self, server):
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    async def load(self, sessions, duration):
+        """Closed loop: every client sends its next request on response."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        samples = {}
+        port = self.options["port"]
+
+        async def client(session):
+            while loop.time() < deadline:
+                operation = session.rng.choices(
+                    session.operations, session.weights)[0]
+                label, method, path, body, expected = session.requests(
+                    operation)
+                sample = samples.setdefault(
+                    label, {"latencies": [], "queries": [], "errors": 0})
+                started = time.perf_counter()
+                try:
+                    status, headers, content = await asyncio.wait_for(
+                        send(port, method, path, session.headers, body), 60)
+                except (OSError, ValueError, IndexError,
+                        asyncio.TimeoutError):
+                    sample["errors"] += 1
+                    continue
+                if status not in expected:
+                    sample["errors"] += 1
+                    continue
+                sample["latencies"].append(
+                    (time.perf_counter() - started) * 1000)
+                if QUERIES_HEADER in headers:
+                    sample["queries"].append(int(headers[QUERIES_HEADER]))
+                if label == "recipe create":
+                    session.created.append(json.loads(content)["id"])
+
+        started = loop.time()
+        await asyncio.gather(*(client(session) for session in sessions))
+        return samples, loop.time() - started
+
+    async def cleanup(self, sessions):
+        port = self.options["port"]
+        for session in sessions:
+            for method, path in session.cleanup():
+                await send(port, method, path, session.headers)
+
+    def summarize(self, sample, elapsed):
+        latencies = sorted(sample["latencies"])
+        queries = sample["queries"]
+        return {
+            "requests": len(latencies),
+            "errors": sample["errors"],
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "queries": round(sum(queries) / len(queries), 2)
+            if queries else None,
+        }
+
+    def show(self, results):
+        meta = results["meta"]
+        self.stdout.write(
+            f"{meta['mix']} mix, {meta['concurrency']} clients, "
+            f"{meta['workers']} workers, {meta['duration']}s, "
+            f"{meta['recipes']:,} recipes")
+        self.stdout.write(
+            f"{'endpoint':<24}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+            f"{'queries':>9}{'errors':>8}")
+        for label, row in results["endpoints"].items():
+            queries = "-" if row["queries"] is None else row["queries"]
+            self.stdout.write(
+                f"{label:<24}{row['rps']:>8}{row['p50']:>8}{row['p95']:>8}"
+                f"{row['p99']:>8}{queries:>9}{row['errors']:>8}")
+
+    def compare(self, baseline, results):
+        """
+        Flag endpoints whose p95 grew or throughput fell by more than
+        the threshold, or that send more queries per request.
+        """
+        threshold = self.options["threshold"] / 100
+        for key in ("mix", "concurrency", "workers", "database"):
+            if baseline["meta"].get(key) != results["meta"].get(key):
+                self.stderr.write(self.style.WARNING(
+                    f"Runs differ in {key}: {baseline['meta'].get(key)} "
+                    f"and {results['meta'].get(key)}"))
+        regressions = 0
+        for label, row in results["endpoints"].items():
+            before = baseline["endpoints"].get(label)
+            if before is None:
+                self.stdout.write(f"{label}: new endpoint")
+                continue
+            if min(before["requests"], row["requests"]) < MIN_SAMPLES:
+                self.stdout.write(
+                    f"{label}: too few requests to compare, run longer")
+                continue
+            problems = []
+            if before["p95"] and row["p95"] > before["p95"] * (1 + threshold):
+                problems.append(f"p95 {before['p95']} -> {row['p95']}ms")
+            if before["rps"] and row["rps"] < before["rps"] * (1 - threshold):
+                problems.append(f"req/s {before['rps']} -> {row['rps']}")
+            if (before["queries"] is not None and row["queries"] is not None
+                    and row["queries"] > before["queries"] + 0.5):
+                problems.append(
+                    f"queries {before['queries']} -> {row['queries']}")
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(
+                    f"{label}: REGRESSION {', '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label}: ok, p95 {before['p95']} -> {row['p95']}ms, "
+                    f"req/s {before['rps']} -> {row['rps']}"))
+        return regressions
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Ingredient, Recipe
+from recipes.short_links import encode
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+MODES = ("wsgi", "asgi")
+HOST = "127.0.0.1"
+
+# Runs gunicorn in the server process. Every database query sleeps
+# for the given latency, standing in for a remote database or storage.
+SERVER = """
+import sys
+import time
+
+from django.db.backends.signals import connection_created
+
+mode, workers, bind, latency = sys.argv[1:]
+latency = float(latency)
+
+
+def slow(execute, sql, params, many, context):
+    time.sleep(latency)
+    return execute(sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    if slow not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow)
+
+
+if latency:
+    connection_created.connect(install, weak=False)
+
+from gunicorn.app.wsgiapp import run
+
+sys.argv = ["gunicorn", "--bind", bind, "--workers", workers,
+            "--log-level", "warning"]
+if mode == "asgi":
+    sys.argv += ["--worker-class", "uvicorn.workers.UvicornWorker",
+                 "foodgram.asgi:application"]
+else:
+    sys.argv += ["foodgram.wsgi:application"]
+run()
+"""
+
+
+def children(pid):
+    """Return the pids of the direct children of a process."""
+    found = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces, fields follow the last ")".
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            found.append(int(entry.name))
+    return found
+
+
+def rss_mb(pid):
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+async def fetch(port, path, headers):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        lines = [f"GET {path} HTTP/1.1", "Host: localhost",
+                 "Connection: close", *headers, "", ""]
+        writer.write("\r\n".join(lines).encode())
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and p99 latency of the hot read endpoints "
+        "served by sync WSGI workers and by ASGI workers with the async "
+        "views, each with as many workers as fit the same memory budget. "
+        "Run it against a populated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--memory-mb", type=int, default=600,
+                            help="Memory budget of all workers together.")
+        parser.add_argument("--concurrency", type=int, nargs="+",
+                            default=[16, 64, 256])
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--db-latency-ms", type=float, default=10,
+                            help="Delay added to every database query.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options["seed"])
+        token, created = self.prepare()
+        try:
+            for mode in MODES:
+                workers, worker_mb = self.size(mode)
+                self.stdout.write(
+                    f"{mode}: {worker_mb:.0f}MB per loaded worker, "
+                    f"{workers} workers in {options['memory_mb']}MB")
+                for concurrency in options["concurrency"]:
+                    self.report(mode, workers, concurrency)
+        finally:
+            if created:
+                token.delete()
+
+    def prepare(self):
+        ids = list(Recipe.objects.values_list("id", flat=True)[:200])
+        if not ids:
+            raise CommandError("No recipes, populate the database first.")
+        user = User.objects.filter(is_active=True).order_by("id").first()
+        token, created = Token.objects.get_or_create(user=user)
+        names = list(Ingredient.objects.values_list("name", flat=True)[:50])
+        self.requests = [("/api/v1/recipes/", ()), ("/api/v1/tags/", ())]
+        self.requests += [(f"/api/v1/recipes/{pk}/", ()) for pk in ids[:20]]
+        self.requests += [(f"/s/{encode(pk)}/", ()) for pk in ids[:20]]
+        self.requests += [
+            (f"/api/v1/ingredients/?name={quote(name[:3])}", ())
+            for name in names[:10]
+        ]
+        authorization = (f"Authorization: Token {token.key}",)
+        self.requests += [
+            ("/api/v1/users/me/", authorization),
+            ("/api/v1/recipes/?page=2", authorization),
+        ]
+        return token, created
+
+    def start(self, mode, workers):
+        env = {
+            **os.environ,
+            "ASYNC_READ_VIEWS": "true" if mode == "asgi" else "false",
+        }
+        argv = [sys.executable, "-c", SERVER, mode, str(workers),
+                f"{HOST}:{self.options['port']}",
+                str(self.options["db_latency_ms"] / 1000)]
+        server = subprocess.Popen(argv, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                asyncio.run(fetch(self.options["port"], "/api/v1/tags/", ()))
+                return server
+            except OSError:
+                time.sleep(0.2)
+        self.stop(server)
+        raise CommandError(f"{mode} server did not start.")
+
+    def stop(self, server):
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    def size(self, mode):
+        """Measure one loaded worker and fit workers into the budget."""
+        server = self.start(mode, 1)
+        try:
+            asyncio.run(self.load(max(self.options["concurrency"]), 3))
+            worker_mb = max(rss_mb(pid) for pid in children(server.pid))
+        finally:
+            self.stop(server)
+        return max(1, int(self.options["memory_mb"] // worker_mb)), worker_mb
+
+    def report(self, mode, workers, concurrency):
+        server = self.start(mode, workers)
+        try:
+            latencies, errors, elapsed = asyncio.run(
+                self.load(concurrency, self.options["duration"]))
+            total_mb = sum(rss_mb(pid) for pid in children(server.pid))
+        finally:
+            self.stop(server)
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+        self.stdout.write(
+            f"  {concurrency} clients: "
+            f"{len(latencies) / elapsed:,.0f} req/s, "
+            f"p50 {statistics.median(latencies or [0]):.0f}ms, "
+            f"p99 {p99:.0f}ms, errors {errors}, workers RSS {total_mb:.0f}MB"
+        )
+
+    async def load(self, concurrency, duration):
+        """Closed loop: every client sends its next request on response."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal errors
+            while loop.time() < deadline:
+                path, headers = self.random.choice(self.requests)
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        fetch(self.options["port"], path, headers), 60)
+                except (OSError, ValueError, IndexError,
+                        asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                if status >= 500:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = loop.time()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, loop.time() - started
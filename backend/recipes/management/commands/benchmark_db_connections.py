@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_api import MIXES
+
+# Server environment of each connection mode, read by foodgram.settings.
+MODES = {
+    "new": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "60"},
+    "pool": {"DB_POOL": "true"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare API request latency with a new database connection per "
+        "request, persistent connections and the connection pool. Runs "
+        "benchmark_api once per mode against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", nargs="+", choices=MODES,
+                            default=list(MODES))
+        parser.add_argument("--mix", choices=MIXES, default="browse")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=20)
+        parser.add_argument("--warmup", type=float, default=3)
+        parser.add_argument("--workers", type=int, default=2,
+                            help="Gunicorn sync workers.")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--save", help="Write the results as JSON.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in options["modes"]:
+            self.stdout.write(f"Running {mode} connections")
+            results[mode] = self.run(mode, options)
+        self.show(results, options)
+        if options["save"]:
+            Path(options["save"]).write_text(json.dumps(results, indent=2))
+
+    def run(self, mode, options):
+        # The benchmark server inherits the environment of this process.
+        saved = {name: os.environ.get(name) for name in MODES[mode]}
+        os.environ.update(MODES[mode])
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory, "results.json")
+                output = StringIO()
+                call_command(
+                    "benchmark_api",
+                    mix=options["mix"],
+                    concurrency=options["concurrency"],
+                    duration=options["duration"],
+                    warmup=options["warmup"],
+                    workers=options["workers"],
+                    port=options["port"],
+                    save=str(path),
+                    stdout=output,
+                )
+                if options["verbosity"] > 1:
+                    self.stdout.write(output.getvalue())
+                return json.loads(path.read_text())
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    def show(self, results, options):
+        modes = list(results)
+        labels = sorted({
+            label for result in results.values()
+            for label in result["endpoints"]
+        })
+        if not labels:
+            raise CommandError("No requests were measured.")
+        self.stdout.write(
+            f"{options['mix']} mix, {options['concurrency']} clients, "
+            f"{options['workers']} workers, p50 / p95 ms")
+        self.stdout.write(
+            f"{'endpoint':<24}" + "".join(f"{mode:>18}" for mode in modes))
+        for label in labels + ["total req/s"]:
+            cells = []
+            for mode in modes:
+                endpoints = results[mode]["endpoints"]
+                if label == "total req/s":
+                    cells.append(
+                        f"{sum(row['rps'] for row in endpoints.values()):.1f}")
+                elif label in endpoints:
+                    row = endpoints[label]
+                    cells.append(f"{row['p50']} / {row['p95']}")
+                else:
+                    cells.append("-")
+            self.stdout.write(
+                f"{label:<24}" + "".join(f"{cell:>18}" for cell in cells))
@@ -0,0 +1,122 @@
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from recipes.models import Recipe
+from recipes.search import get_recipe_search
+
+User = get_user_model()
+
+DISHES = (
+    "суп", "салат", "пирог", "запеканка", "каша", "рагу", "омлет",
+    "паста", "соус", "котлеты", "блины", "торт", "плов", "борщ",
+)
+METHODS = (
+    "тушить", "запекать", "варить", "жарить", "смешать", "нарезать",
+    "посолить", "подавать", "охладить", "взбить",
+)
+
+
+class Rollback(Exception):
+    """Raised to discard the generated corpus."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ranked recipe search against an icontains scan "
+        "over a generated corpus. The corpus is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        path = Path(settings.BASE_DIR) / "data" / "ingredients.json"
+        with open(path, encoding="utf-8") as file:
+            self.vocabulary = [
+                item["name"].split()[0] for item in json.load(file)]
+
+        try:
+            with transaction.atomic():
+                self.generate(options["recipes"], options["batch_size"])
+                self.run(options["queries"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def sentence(self, words):
+        return " ".join(self.random.choice(self.vocabulary)
+                        for _ in range(words))
+
+    def generate(self, total, batch_size):
+        started = time.monotonic()
+        author = User.objects.create(
+            email="search-benchmark@example.com",
+            username="search-benchmark",
+        )
+        for offset in range(0, total, batch_size):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=(f"{self.random.choice(DISHES)} "
+                          f"{self.sentence(2)}").capitalize(),
+                    text=" ".join(
+                        f"{self.random.choice(METHODS)} {self.sentence(3)}."
+                        for _ in range(6)
+                    ),
+                    image="recipes/images/benchmark.png",
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for _ in range(min(batch_size, total - offset))
+            )
+        get_recipe_search().update(Recipe.objects.filter(author=author))
+        self.stdout.write(
+            f"Generated {total} recipes "
+            f"in {time.monotonic() - started:.1f}s")
+
+    def run(self, total):
+        queries = [
+            self.random.choice(
+                (self.random.choice(DISHES), self.sentence(1),
+                 f"{self.random.choice(DISHES)} {self.sentence(1)}")
+            )
+            for _ in range(total)
+        ]
+        engine = get_recipe_search()
+
+        def ranked(query):
+            return list(engine.filter(Recipe.objects.all(), query)[:10])
+
+        def scan(query):
+            condition = Q()
+            for word in query.split():
+                condition &= (Q(name__icontains=word)
+                              | Q(text__icontains=word))
+            return list(Recipe.objects.filter(condition)[:10])
+
+        for label, search in (
+            (type(engine).__name__, ranked),
+            ("icontains scan", scan),
+        ):
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label}: p50 {statistics.median(timings):.2f}ms, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f}ms, "
+                f"max {timings[-1]:.2f}ms"
+            )
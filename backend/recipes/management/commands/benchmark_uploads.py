@@ -0,0 +1,196 @@
+import base64
+import io
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.test.client import BOUNDARY, encode_multipart
+from PIL import Image
+from recipes.models import Ingredient, Tag
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+MODES = ("base64", "multipart", "chunked")
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency and peak memory of creating a recipe with a "
+        "base64 JSON image, a multipart upload and a chunked upload. "
+        "Each mode runs in its own process; all data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=float, default=8)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--chunk-mb", type=float, default=1)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--mode", choices=MODES,
+                            help="Run a single mode in this process.")
+        parser.add_argument("--image", help="Image used by --mode.")
+
+    def handle(self, *args, **options):
+        if options["mode"]:
+            result = self.run_mode(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        # The image is generated here, so its raw pixels don't set the
+        # peak RSS of the measuring processes.
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image:
+            image.write(self.make_image(options["size_mb"], options["seed"]))
+            image.flush()
+            for mode in MODES:
+                self.report(mode, image.name, options)
+
+    def report(self, mode, image, options):
+        argv = [sys.executable, sys.argv[0], "benchmark_uploads",
+                "--mode", mode, "--image", image,
+                "--repeat", str(options["repeat"]),
+                "--chunk-mb", str(options["chunk_mb"])]
+        output = subprocess.run(
+            argv, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        self.stdout.write(
+            f"{mode}: image {result['image_mb']:.1f}MB, "
+            f"request body {result['body_mb']:.1f}MB, "
+            f"p50 {result['p50']:.0f}ms, max {result['max']:.0f}ms, "
+            f"peak python heap {result['heap_mb']:.1f}MB, "
+            f"peak RSS +{result['rss_mb']:.1f}MB"
+        )
+
+    def make_image(self, size_mb, seed):
+        """Random noise JPEG of roughly size_mb, noise barely compresses."""
+        side = int((size_mb * 1024 * 1024 / 1.2) ** 0.5)
+        pixels = random.Random(seed).randbytes(side * side * 3)
+        buffer = io.BytesIO()
+        Image.frombytes("RGB", (side, side), pixels).save(
+            buffer, "JPEG", quality=95)
+        return buffer.getvalue()
+
+    def run_mode(self, options):
+        with open(options["image"], "rb") as file:
+            image = file.read()
+        chunk_size = int(options["chunk_mb"] * 1024 * 1024)
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            ALLOWED_HOSTS=["*"],
+            MEDIA_ROOT=f"{root}/media",
+            CHUNKED_UPLOAD_ROOT=f"{root}/uploads",
+        ):
+            try:
+                with transaction.atomic():
+                    result = self.measure(
+                        options["mode"], image, chunk_size, options["repeat"])
+                    raise Rollback
+            except Rollback:
+                pass
+        return result
+
+    def measure(self, mode, image, chunk_size, repeat):
+        user = User.objects.create(
+            email="upload-benchmark@example.com",
+            username="upload-benchmark",
+        )
+        token = Token.objects.create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        fields = {
+            "name": "Benchmark",
+            "text": "Benchmark",
+            "cooking_time": 10,
+            "tags": [Tag.objects.create(name="bench", slug="bench").pk],
+        }
+        ingredient = Ingredient.objects.create(
+            name="benchmark", measurement_unit="g")
+
+        # Request bodies are built up front so the measurement covers
+        # what the server does with them, not how the client builds them.
+        if mode == "base64":
+            encoded = base64.b64encode(image).decode()
+            body = json.dumps({
+                **fields,
+                "ingredients": [{"id": ingredient.pk, "amount": 1}],
+                "image": f"data:image/jpeg;base64,{encoded}",
+            })
+            del encoded
+            content_type = "application/json"
+        else:
+            body = encode_multipart(BOUNDARY, {
+                **fields,
+                "ingredients[0]id": ingredient.pk,
+                "ingredients[0]amount": 1,
+                "image": self.named(image),
+            }) if mode == "multipart" else None
+            # A fresh string: the test client would re-encode the body
+            # if given the MULTIPART_CONTENT constant itself.
+            content_type = f"multipart/form-data; boundary={BOUNDARY}"
+
+        def send():
+            if mode != "chunked":
+                return client.post(
+                    "/api/v1/recipes/", body, content_type=content_type)
+            upload = client.post(
+                "/api/v1/uploads/",
+                {"filename": "benchmark.jpg", "size": len(image)},
+                content_type="application/json",
+            ).json()
+            for offset in range(0, len(image), chunk_size):
+                client.patch(
+                    f"/api/v1/uploads/{upload['token']}/",
+                    image[offset:offset + chunk_size],
+                    content_type="application/offset+octet-stream",
+                    HTTP_UPLOAD_OFFSET=str(offset),
+                )
+            return client.post(
+                "/api/v1/recipes/",
+                {**fields,
+                 "ingredients": [{"id": ingredient.pk, "amount": 1}],
+                 "image": f"upload:{upload['token']}"},
+                content_type="application/json",
+            )
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = send()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 201:
+                raise RuntimeError(response.content[:500])
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        send()
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        megabyte = 1024 * 1024
+        return {
+            "image_mb": len(image) / megabyte,
+            "body_mb": len(body or image) / megabyte,
+            "p50": statistics.median(timings),
+            "max": max(timings),
+            "heap_mb": heap_peak / megabyte,
+            # ru_maxrss is in kilobytes on Linux.
+            "rss_mb": (rss_after - rss_before) / 1024,
+        }
+
+    @staticmethod
+    def named(content):
+        file = io.BytesIO(content)
+        file.name = "benchmark.jpg"
+        return file
@@ -0,0 +1,310 @@
+import io
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from recipes import cart
+from recipes.cache import RECIPES_VERSION, bump_version
+from recipes.management.commands.load_catalog import batched
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.search import get_recipe_search
+from users.models import Subscription
+
+User = get_user_model()
+
+IMAGE_NAME = "recipes/images/generated.jpg"
+DISHES = (
+    "Салат", "Суп", "Пирог", "Рагу", "Запеканка", "Паста", "Омлет",
+    "Каша", "Плов", "Котлеты", "Соус", "Десерт",
+)
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Пётр", "Ольга", "Алексей")
+LAST_NAMES = ("Иванова", "Петров", "Смирнова", "Кузнецов", "Попова")
+
+
+class Zipf:
+    """
+    Draws items 0..n-1 with P(rank k) ~ 1 / k ** s. Ranks are shuffled
+    over the items, so popularity doesn't follow the insertion order.
+    """
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.items = list(range(n))
+        rng.shuffle(self.items)
+        self.cum_weights = list(
+            accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+    def sample(self, k):
+        return self.rng.choices(
+            self.items, cum_weights=self.cum_weights, k=k)
+
+    def distinct(self, k, exclude=None):
+        """Up to k different items, fewer if popular ones keep repeating."""
+        found = set()
+        for _ in range(10):
+            found.update(self.sample(k - len(found)))
+            found.discard(exclude)
+            if len(found) >= k:
+                break
+        return sorted(found)[:k]
+
+
+@contextmanager
+def explicit_timestamps(model, *names):
+    """Let bulk_create keep the given auto_now/auto_now_add values."""
+    fields = [model._meta.get_field(name) for name in names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, recipes, favorites, carts and subscriptions "
+        "for performance work. Authors and relations follow Zipf "
+        "distributions, ingredients come from the loaded catalog and "
+        "the same seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10_000)
+        parser.add_argument("--favorites-per-user", type=float, default=20,
+                            help="Mean number of favorites per user.")
+        parser.add_argument("--cart-per-user", type=float, default=3)
+        parser.add_argument("--subscriptions-per-user", type=float,
+                            default=5)
+        parser.add_argument("--zipf", type=float, default=1.1,
+                            help="Zipf exponent of author and recipe "
+                                 "popularity.")
+        parser.add_argument("--days", type=int, default=365,
+                            help="Publication dates span this many days.")
+        parser.add_argument("--password", default="foodgram-password",
+                            help="Password of every generated user.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.prefix = f"gen{options['seed']}_"
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(
+                f"Data for seed {options['seed']} exists, use another seed.")
+        if options["users"] < 2 or options["recipes"] < 1:
+            raise CommandError("Generate at least 2 users and 1 recipe.")
+
+        started = time.monotonic()
+        call_command("load_catalog", verbosity=0)
+        self.ingredients = list(Ingredient.objects.values_list("pk", "name"))
+        self.tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        if not default_storage.exists(IMAGE_NAME):
+            default_storage.save(IMAGE_NAME, ContentFile(self.make_image()))
+
+        counts = self.count()
+        with transaction.atomic():
+            user_ids = self.create_users(counts)
+            recipe_ids = self.create_recipes(counts, user_ids)
+            self.create_relations(
+                "subscriptions", Subscription, self.subscriptions,
+                lambda user, author: Subscription(
+                    user_id=user_ids[user], author_id=user_ids[author]))
+            self.create_relations(
+                "favorites", Favorite, self.favorites,
+                lambda user, recipe: Favorite(
+                    user_id=user_ids[user], recipe_id=recipe_ids[recipe]))
+            self.create_relations(
+                "carts", ShoppingCart, self.carts,
+                lambda user, recipe: ShoppingCart(
+                    user_id=user_ids[user], recipe_id=recipe_ids[recipe]))
+            self.rebuild_cart_totals(user_ids)
+
+        # Bulk inserts send no signals.
+        bump_version(RECIPES_VERSION)
+        call_command("rebuild_feeds", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated in {time.monotonic() - started:.1f}s"))
+
+    def stream(self, name):
+        """Random generator of one data stream, replayable from the seed."""
+        return random.Random(f"{self.options['seed']}:{name}")
+
+    def per_user(self, rng, mean):
+        return int(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+    def authors(self):
+        """Author of every recipe, a few authors write most of them."""
+        rng = self.stream("authors")
+        zipf = Zipf(self.options["users"], self.options["zipf"], rng)
+        for author in zipf.sample(self.options["recipes"]):
+            yield author
+
+    def subscriptions(self):
+        rng = self.stream("subscriptions")
+        zipf = Zipf(self.options["users"], self.options["zipf"], rng)
+        mean = self.options["subscriptions_per_user"]
+        for user in range(self.options["users"]):
+            for author in zipf.distinct(self.per_user(rng, mean), user):
+                yield user, author
+
+    def recipe_relations(self, name, mean):
+        rng = self.stream(name)
+        zipf = Zipf(self.options["recipes"], self.options["zipf"], rng)
+        for user in range(self.options["users"]):
+            for recipe in zipf.distinct(self.per_user(rng, mean)):
+                yield user, recipe
+
+    def favorites(self):
+        return self.recipe_relations(
+            "favorites", self.options["favorites_per_user"])
+
+    def carts(self):
+        return self.recipe_relations("carts", self.options["cart_per_user"])
+
+    def count(self):
+        """
+        First pass over the relation streams to get the denormalized
+        counters, so rows are inserted with their final values.
+        """
+        started = time.monotonic()
+        users, recipes = self.options["users"], self.options["recipes"]
+        counts = {
+            "recipes_count": array("L", [0]) * users,
+            "subscribers_count": array("L", [0]) * users,
+            "favorites_count": array("L", [0]) * recipes,
+            "in_carts_count": array("L", [0]) * recipes,
+        }
+        for author in self.authors():
+            counts["recipes_count"][author] += 1
+        for _, author in self.subscriptions():
+            counts["subscribers_count"][author] += 1
+        for _, recipe in self.favorites():
+            counts["favorites_count"][recipe] += 1
+        for _, recipe in self.carts():
+            counts["in_carts_count"][recipe] += 1
+        self.stdout.write(
+            f"counted relations in {time.monotonic() - started:.1f}s")
+        return counts
+
+    def insert(self, label, model, objects):
+        """bulk_create in batches, return the primary keys in order."""
+        started = time.monotonic()
+        pks = array("q")
+        for batch in batched(objects, self.options["batch_size"]):
+            pks.extend(
+                obj.pk for obj in model.objects.bulk_create(batch))
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{label}: {len(pks):,} rows in {elapsed:.1f}s "
+            f"({len(pks) / max(elapsed, 1e-9):,.0f} rows/s)")
+        return pks
+
+    def create_users(self, counts):
+        rng = self.stream("users")
+        password = make_password(self.options["password"])
+        now = timezone.now()
+        return self.insert("users", User, (
+            User(
+                username=f"{self.prefix}{i}",
+                email=f"{self.prefix}{i}@example.com",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=password,
+                date_joined=now,
+                recipes_count=counts["recipes_count"][i],
+                subscribers_count=counts["subscribers_count"][i],
+            )
+            for i in range(self.options["users"])
+        ))
+
+    def create_recipes(self, counts, user_ids):
+        rng = self.stream("recipes")
+        ingredients = Zipf(len(self.ingredients), self.options["zipf"], rng)
+        total = self.options["recipes"]
+        span = timedelta(days=self.options["days"])
+        first = timezone.now() - span
+        contents = []
+
+        def recipes():
+            for i, author in enumerate(self.authors()):
+                chosen = ingredients.distinct(rng.randint(3, 10))
+                names = [self.ingredients[k][1] for k in chosen]
+                name = f"{rng.choice(DISHES)} с {names[0]}"
+                published = first + span * (i / total)
+                contents.append((
+                    [self.ingredients[k][0] for k in chosen],
+                    rng.sample(self.tag_ids,
+                               rng.randint(1, len(self.tag_ids))),
+                ))
+                yield Recipe(
+                    author_id=user_ids[author],
+                    name=name[:Recipe._meta.get_field("name").max_length],
+                    text=f"{name}. Понадобится: {', '.join(names)}.",
+                    image=IMAGE_NAME,
+                    cooking_time=rng.randint(5, 180),
+                    pub_date=published,
+                    updated_at=published,
+                    favorites_count=counts["favorites_count"][i],
+                    in_carts_count=counts["in_carts_count"][i],
+                )
+
+        started = time.monotonic()
+        recipe_ids = array("q")
+        search = get_recipe_search()
+        with explicit_timestamps(Recipe, "pub_date", "updated_at"):
+            for batch in batched(recipes(), self.options["batch_size"]):
+                pks = [obj.pk for obj in Recipe.objects.bulk_create(batch)]
+                recipe_ids.extend(pks)
+                search.update(Recipe.objects.filter(pk__in=pks))
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe_id=pk, ingredient_id=ingredient,
+                        amount=rng.randint(1, 500))
+                    for pk, (ingredient_ids, _) in zip(pks, contents)
+                    for ingredient in ingredient_ids
+                )
+                Recipe.tags.through.objects.bulk_create(
+                    Recipe.tags.through(recipe_id=pk, tag_id=tag)
+                    for pk, (_, tag_ids) in zip(pks, contents)
+                    for tag in tag_ids
+                )
+                contents.clear()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"recipes with tags and ingredients: {len(recipe_ids):,} "
+            f"recipes in {elapsed:.1f}s "
+            f"({len(recipe_ids) / max(elapsed, 1e-9):,.0f} recipes/s)")
+        return recipe_ids
+
+    def create_relations(self, label, model, rows, build):
+        self.insert(label, model, (build(*row) for row in rows()))
+
+    def rebuild_cart_totals(self, user_ids):
+        started = time.monotonic()
+        for batch in batched(user_ids, 500):
+            cart.rebuild(batch)
+        self.stdout.write(
+            f"cart totals in {time.monotonic() - started:.1f}s")
+
+    def make_image(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), (230, 180, 120)).save(
+            buffer, "JPEG", quality=85)
+        return buffer.getvalue()
@@ -0,0 +1,168 @@
+import csv
+import hashlib
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from recipes.cache import (INGREDIENTS_VERSION, TAGS_VERSION, bump_version,
+                           invalidate_tag_slug_map)
+from recipes.models import CatalogImport, Ingredient, Tag
+
+READ_CHUNK_SIZE = 64 * 1024
+DATA_DIR = Path(settings.BASE_DIR) / "data"
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_json_array(file):
+    """Yield the items of a top-level JSON array without loading it all."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), ""):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started:
+                if position == len(buffer):
+                    break
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array.")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The item continues in the next chunk.
+                break
+            yield item
+        buffer = buffer[position:]
+    if buffer.strip():
+        raise ValueError("Unterminated JSON array.")
+
+
+def iter_ingredients(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.suffix == ".csv":
+            for row in csv.reader(file):
+                if len(row) >= 2:
+                    yield row[0], row[1]
+        else:
+            for item in iter_json_array(file):
+                yield item["name"], item["measurement_unit"]
+
+
+def iter_tags(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        for row in csv.reader(file):
+            if not row:
+                continue
+            name = row[0].strip()
+            slug = row[1].strip() if len(row) > 1 else slugify(name)
+            yield name, slug
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tags and ingredients from data files, inserting only the "
+        "missing rows. Files unchanged since the last load are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ingredients",
+            type=Path,
+            default=DATA_DIR / "ingredients.json",
+            help="Ingredients as JSON or as CSV (name,unit).",
+        )
+        parser.add_argument(
+            "--tags",
+            type=Path,
+            default=DATA_DIR / "tags.csv",
+            help="Tags as CSV (name,slug).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Load even if the file hash matches the last load.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        sources = (
+            (options["tags"], Tag, ("name", "slug"), iter_tags),
+            (options["ingredients"], Ingredient,
+             ("name", "measurement_unit"), iter_ingredients),
+        )
+        changed = False
+        for path, model, fields, reader in sources:
+            if not path.exists():
+                raise CommandError(f"File not found: {path}")
+            changed |= self.load(path, model, fields, reader, options)
+
+        if changed:
+            # Bulk inserts send no signals.
+            invalidate_tag_slug_map()
+            bump_version(TAGS_VERSION)
+            bump_version(INGREDIENTS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog loaded in {time.monotonic() - started:.2f}s"))
+
+    def load(self, path, model, fields, reader, options):
+        started = time.monotonic()
+        source = f"{model._meta.label}:{path.name}"
+        digest = file_digest(path)
+        if not options["force"] and CatalogImport.objects.filter(
+                source=source, digest=digest).exists():
+            self.stdout.write(f"{source}: unchanged, skipped")
+            return False
+
+        with transaction.atomic():
+            known = set(model.objects.values_list(*fields))
+            existing = model.objects.count()
+            for batch in batched(
+                    self.missing(reader(path), known), options["batch_size"]):
+                # Rows clashing on another unique field are skipped.
+                model.objects.bulk_create(
+                    (model(**dict(zip(fields, row))) for row in batch),
+                    ignore_conflicts=True,
+                )
+            inserted = model.objects.count() - existing
+            CatalogImport.objects.update_or_create(
+                source=source, defaults={"digest": digest})
+
+        self.stdout.write(
+            f"{source}: {existing} existing, {inserted} new rows "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+        return inserted > 0
+
+    @staticmethod
+    def missing(rows, known):
+        for row in rows:
+            if row not in known:
+                known.add(row)
+                yield row
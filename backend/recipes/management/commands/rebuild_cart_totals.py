@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes import cart
+from recipes.models import CartIngredient, ShoppingCart
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the aggregated shopping cart totals against the carts "
+        "and rebuild them for users whose totals drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of users processed per batch.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report inconsistent users, exit 1 if any.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every user, not only the inconsistent ones.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+        user_ids = sorted(
+            set(ShoppingCart.objects.values_list("user_id", flat=True))
+            | set(CartIngredient.objects.values_list("user_id", flat=True))
+        )
+
+        inconsistent = []
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            if options["all"]:
+                drifted = batch
+            else:
+                drifted = self.find_drifted(batch)
+            inconsistent += drifted
+            if drifted and not options["check"]:
+                with transaction.atomic():
+                    cart.rebuild(drifted)
+
+        elapsed = time.monotonic() - started
+        if options["check"]:
+            if inconsistent:
+                raise CommandError(
+                    f"Cart totals are inconsistent for {len(inconsistent)} "
+                    f"users: {inconsistent[:20]}"
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"Cart totals of {len(user_ids)} users are consistent "
+                f"({elapsed:.2f}s)"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt cart totals for {len(inconsistent)} "
+            f"of {len(user_ids)} users in {elapsed:.2f}s"
+        ))
+
+    def find_drifted(self, user_ids):
+        actual = cart.actual_totals(user_ids)
+        stored = {
+            key: total
+            for key, total in cart.stored_totals(user_ids).items()
+            if total > 0
+        }
+        return sorted({
+            user_id
+            for user_id, _ in actual.keys() ^ stored.keys()
+        } | {
+            user_id
+            for (user_id, ingredient_id), total in actual.items()
+            if stored.get((user_id, ingredient_id)) != total
+        })
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from recipes import feed
+from recipes.models import FeedEntry
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the feed timelines from the subscriptions, e.g. after "
+        "a bulk import that sent no signals, or with --trim only cut "
+        "timelines down to FEED_LENGTH entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trim",
+            action="store_true",
+            help="Only trim timelines longer than FEED_LENGTH.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["trim"]:
+            user_ids = list(
+                FeedEntry.objects.values("user_id")
+                .annotate(entries=Count("id"))
+                .filter(entries__gt=settings.FEED_LENGTH)
+                .values_list("user_id", flat=True)
+            )
+            deleted = sum(feed.trim(user_id) for user_id in user_ids)
+            self.stdout.write(self.style.SUCCESS(
+                f"Trimmed {deleted} entries from {len(user_ids)} timelines "
+                f"in {time.monotonic() - started:.2f}s"
+            ))
+            return
+
+        popular = set(
+            User.objects.filter(
+                subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+            ).values_list("id", flat=True)
+        )
+        authors = {}
+        for user_id, author_id in Subscription.objects.values_list(
+                "user_id", "author_id").iterator():
+            if author_id not in popular:
+                authors.setdefault(user_id, []).append(author_id)
+
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            for user_id, author_ids in authors.items():
+                feed.backfill(user_id, author_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(authors)} timelines in "
+            f"{time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,110 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    """Return a correlated COUNT(*) of model rows pointing at OuterRef."""
+    counts = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute denormalized favorites/cart/recipes/subscribers "
+        "counters and repair the rows that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows checked per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted rows without writing them.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        recipes_fixed = self.repair(
+            Recipe,
+            {
+                "favorites_count": count_subquery(Favorite, "recipe"),
+                "in_carts_count": count_subquery(ShoppingCart, "recipe"),
+            },
+            batch_size,
+            dry_run,
+        )
+        users_fixed = self.repair(
+            User,
+            {
+                "recipes_count": count_subquery(Recipe, "author"),
+                "subscribers_count": count_subquery(Subscription, "author"),
+            },
+            batch_size,
+            dry_run,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Found' if dry_run else 'Repaired'} "
+                f"{recipes_fixed} recipes and {users_fixed} users "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        )
+
+    def repair(self, model, expressions, batch_size, dry_run):
+        """Compare stored counters with actual counts batch by batch."""
+        fields = list(expressions)
+        annotations = {
+            f"actual_{field}": expression
+            for field, expression in expressions.items()
+        }
+        fixed = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .annotate(**annotations)
+                .only("pk", *fields)[:batch_size]
+            )
+            if not batch:
+                return fixed
+            last_pk = batch[-1].pk
+
+            drifted = [
+                obj.pk
+                for obj in batch
+                if any(
+                    getattr(obj, field) != getattr(obj, f"actual_{field}")
+                    for field in fields
+                )
+            ]
+
+            fixed += len(drifted)
+            if drifted and not dry_run:
+                # Recount inside the UPDATE itself so writes that landed
+                # after the check are not overwritten with stale values.
+                model.objects.filter(pk__in=drifted).update(**expressions)
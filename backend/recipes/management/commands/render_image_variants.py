@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from recipes.images import get_executor, process_variants
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Render missing image variants of recipes and avatars."
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field, variants_field in (
+            (Recipe, "image", "image_variants"),
+            (User, "avatar", "avatar_variants"),
+        ):
+            rows = model.objects.exclude(**{field: ""}).exclude(
+                **{f"{field}__isnull": True}).values_list(
+                "pk", field, variants_field)
+            for pk, name, variants in rows.iterator():
+                if variants.get("source") == name:
+                    continue
+                process_variants(model, pk, field, variants_field, name)
+                total += 1
+        if settings.IMAGE_PROCESSING_WORKERS:
+            get_executor().shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered variants of {total} images"))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:11
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Build the GIN index and fill search vectors on PostgreSQL only."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX recipe_search_vector_idx "
+        "ON recipes_recipe USING gin (search_vector)"
+    )
+    Recipe = apps.get_model("recipes", "Recipe")
+    config = settings.RECIPE_SEARCH_CONFIG
+    Recipe.objects.update(
+        search_vector=SearchVector("name", weight="A", config=config)
+        + SearchVector("text", weight="B", config=config)
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS recipe_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
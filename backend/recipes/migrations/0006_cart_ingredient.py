@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def populate_cart_totals(apps, schema_editor):
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    CartIngredient = apps.get_model("recipes", "CartIngredient")
+    totals = (
+        ShoppingCart.objects.values_list(
+            "user_id", "recipe__recipe_ingredients__ingredient_id"
+        )
+        .annotate(total=Sum("recipe__recipe_ingredients__amount"))
+        .order_by()
+    )
+    CartIngredient.objects.bulk_create(
+        (
+            CartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, total_amount=total
+            )
+            for user_id, ingredient_id, total in totals
+            if ingredient_id is not None
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0005_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CartIngredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.IntegerField(default=0, verbose_name="Total amount"),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cart_ingredients",
+                        to="recipes.ingredient",
+                        verbose_name="Ingredient",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cart_ingredients",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Shopping cart ingredient",
+                "verbose_name_plural": "Shopping cart ingredients",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="cartingredient",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"), name="unique_cart_ingredient"
+            ),
+        ),
+        migrations.RunPython(populate_cart_totals, migrations.RunPython.noop),
+    ]
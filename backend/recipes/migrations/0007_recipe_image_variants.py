@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_cart_ingredient"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_variants",
+            field=models.JSONField(
+                default=dict, editable=False, verbose_name="Image variants"
+            ),
+        ),
+    ]
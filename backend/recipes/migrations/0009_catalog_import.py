@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_recipe_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        max_length=200, unique=True, verbose_name="Source"
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(max_length=64, verbose_name="Content hash"),
+                ),
+                (
+                    "loaded_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Loaded"),
+                ),
+            ],
+            options={
+                "verbose_name": "Catalog import",
+                "verbose_name_plural": "Catalog imports",
+            },
+        ),
+    ]
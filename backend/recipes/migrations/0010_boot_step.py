@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_catalog_import"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BootStep",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=200, unique=True, verbose_name="Step"),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(max_length=64, verbose_name="Fingerprint"),
+                ),
+                ("duration", models.FloatField(verbose_name="Duration, s")),
+                (
+                    "completed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Completed"),
+                ),
+            ],
+            options={
+                "verbose_name": "Boot step",
+                "verbose_name_plural": "Boot steps",
+            },
+        ),
+    ]
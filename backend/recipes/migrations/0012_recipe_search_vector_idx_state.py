@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:58
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0011_feed_entry"),
+    ]
+
+    operations = [
+        # 0005 created the index with raw SQL on PostgreSQL only, this
+        # records it in the model state.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="recipe",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"],
+                        name="recipe_search_vector_idx",
+                    ),
+                ),
+            ],
+        ),
+    ]
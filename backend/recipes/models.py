@@ -1,6 +1,8 @@
 # recipes/models.py
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 from recipes.constants import MAX_LENGTH
@@ -81,6 +83,11 @@ class Recipe(models.Model):
         "Image",
         upload_to="recipes/images/",
     )
+    image_variants = models.JSONField(
+        "Image variants",
+        default=dict,
+        editable=False,
+    )
     text = models.TextField(
         "Description",
     )
@@ -106,11 +113,40 @@ class Recipe(models.Model):
         "Publication date",
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        "Updated",
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        "In favorites",
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        "In shopping carts",
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Recipe"
         verbose_name_plural = "Recipes"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["pub_date", "id"],
+                name="recipe_pub_date_id_idx",
+            ),
+            # Created on PostgreSQL only, see migration 0005.
+            GinIndex(
+                fields=["search_vector"],
+                name="recipe_search_vector_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -154,41 +190,198 @@ class RecipeIngredient(models.Model):
 class UserRecipeRelation(models.Model):
     """Abstract model for user-recipe relations."""
 
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.user} - {self.recipe}"
+
+
+class Favorite(UserRecipeRelation):
+    """Model for favorite recipes."""
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        related_name="favorites",
         verbose_name="User",
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
+        related_name="favorited_by",
         verbose_name="Recipe",
     )
 
+    class Meta(UserRecipeRelation.Meta):
+        verbose_name = "Favorite"
+        verbose_name_plural = "Favorites"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_favorite"
+            )
+        ]
+
+
+class ShoppingCart(UserRecipeRelation):
+    """Model for shopping cart."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart",
+        verbose_name="User",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="in_shopping_cart",
+        verbose_name="Recipe",
+    )
+
+    class Meta(UserRecipeRelation.Meta):
+        verbose_name = "Shopping cart item"
+        verbose_name_plural = "Shopping cart items"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_shopping_cart"
+            )
+        ]
+
+
+class CartIngredient(models.Model):
+    """Per-user ingredient totals over all recipes in the shopping cart."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="cart_ingredients",
+        verbose_name="User",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="cart_ingredients",
+        verbose_name="Ingredient",
+    )
+    total_amount = models.IntegerField(
+        "Total amount",
+        default=0,
+    )
+
     class Meta:
-        abstract = True
+        verbose_name = "Shopping cart ingredient"
+        verbose_name_plural = "Shopping cart ingredients"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_cart_ingredient"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.ingredient} - {self.total_amount}"
+
+
+class FeedEntry(models.Model):
+    """Recipe of a followed author in a user's feed timeline."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="User",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Recipe",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Author",
+    )
+    pub_date = models.DateTimeField(
+        "Publication date",
+    )
+
+    class Meta:
+        verbose_name = "Feed entry"
+        verbose_name_plural = "Feed entries"
         constraints = [
             models.UniqueConstraint(
                 fields=["user", "recipe"],
-                name="%(class)s_unique_user_recipe"
+                name="unique_feed_entry"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-recipe"],
+                name="feed_entry_timeline_idx",
+            ),
+            models.Index(
+                fields=["user", "author"],
+                name="feed_entry_user_author_idx",
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.user} - {self.recipe}"
+        return f"{self.user}: {self.recipe}"
 
 
-class Favorite(UserRecipeRelation):
-    """Model for favorite recipes."""
+class CatalogImport(models.Model):
+    """Content hash of the last catalog file loaded by load_catalog."""
 
-    class Meta(UserRecipeRelation.Meta):
-        verbose_name = "Favorite"
-        verbose_name_plural = "Favorites"
+    source = models.CharField(
+        "Source",
+        max_length=MAX_LENGTH,
+        unique=True,
+    )
+    digest = models.CharField(
+        "Content hash",
+        max_length=64,
+    )
+    loaded_at = models.DateTimeField(
+        "Loaded",
+        auto_now=True,
+    )
 
+    class Meta:
+        verbose_name = "Catalog import"
+        verbose_name_plural = "Catalog imports"
 
-class ShoppingCart(UserRecipeRelation):
-    """Model for shopping cart."""
+    def __str__(self):
+        return f"{self.source} ({self.digest[:12]})"
 
-    class Meta(UserRecipeRelation.Meta):
-        verbose_name = "Shopping cart item"
-        verbose_name_plural = "Shopping cart items"
+
+class BootStep(models.Model):
+    """Fingerprint of the inputs of a completed container boot step."""
+
+    name = models.CharField(
+        "Step",
+        max_length=MAX_LENGTH,
+        unique=True,
+    )
+    fingerprint = models.CharField(
+        "Fingerprint",
+        max_length=64,
+    )
+    duration = models.FloatField(
+        "Duration, s",
+    )
+    completed_at = models.DateTimeField(
+        "Completed",
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = "Boot step"
+        verbose_name_plural = "Boot steps"
+
+    def __str__(self):
+        return f"{self.name} ({self.fingerprint[:12]})"
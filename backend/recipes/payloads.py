@@ -0,0 +1,107 @@
+# recipes/payloads.py
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .cache import INGREDIENTS_VERSION, TAGS_VERSION, get_versions
+from .models import Recipe, RecipeIngredient
+from .relations import for_request
+from .serializers import RecipeSerializer
+
+# Bump the prefix when the serialized fields change.
+PAYLOAD_KEY = "recipes:payload:v2:{}:{}:{}"
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+# Fields read for a page before its payloads are looked up.
+PAGE_FIELDS = ("id", "author_id", "pub_date", "updated_at")
+
+
+def page_queryset():
+    """Recipes with just enough columns to look their payloads up."""
+    return Recipe.objects.only(*PAGE_FIELDS)
+
+
+def context_fingerprint(request):
+    """
+    Payloads hold absolute URLs and catalog names, so they are keyed
+    by the site root and the tag/ingredient versions.
+    """
+    versions = get_versions([TAGS_VERSION, INGREDIENTS_VERSION])
+    parts = (request.build_absolute_uri("/"),
+             versions[TAGS_VERSION], versions[INGREDIENTS_VERSION])
+    return hashlib.md5(
+        "|".join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def payload_key(pk, updated_at, fingerprint):
+    return PAYLOAD_KEY.format(pk, updated_at.timestamp(), fingerprint)
+
+
+def render(pks, request, fingerprint):
+    """
+    Serialize the user-independent payloads of recipes and cache them.
+    Keys use the updated_at just read, so a concurrent change is never
+    stored under an older key.
+    """
+    recipes = (
+        Recipe.objects.filter(pk__in=pks)
+        .select_related("author")
+        .prefetch_related(
+            "tags",
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient"),
+            ),
+        )
+    )
+    recipes = list(recipes)
+    # The flags rendered here are replaced for every request in build().
+    data = RecipeSerializer(
+        recipes, many=True, context={"request": request}).data
+    payloads = {recipe.pk: item for recipe, item in zip(recipes, data)}
+    cache.set_many({
+        payload_key(recipe.pk, recipe.updated_at, fingerprint):
+            payloads[recipe.pk]
+        for recipe in recipes
+    }, timeout=PAYLOAD_TIMEOUT)
+    return payloads
+
+
+def build(recipes, request):
+    """
+    Return RecipeSerializer output for recipes from page_queryset().
+    Cached payloads are fetched with one get_many, only misses are
+    serialized, then the per-user flags are filled in from the user's
+    relation sets.
+    """
+    relations = for_request(request)
+    fingerprint = context_fingerprint(request)
+    keys = {
+        recipe.pk: payload_key(recipe.pk, recipe.updated_at, fingerprint)
+        for recipe in recipes
+    }
+    found = cache.get_many(keys.values())
+    payloads = {pk: found[key] for pk, key in keys.items() if key in found}
+    missing = [pk for pk in keys if pk not in payloads]
+    if missing:
+        payloads.update(render(missing, request, fingerprint))
+
+    result = []
+    for recipe in recipes:
+        payload = payloads.get(recipe.pk)
+        if payload is None:
+            # Deleted since the page was read.
+            continue
+        result.append({
+            **payload,
+            "author": {
+                **payload["author"],
+                "is_subscribed": relations.is_subscribed(recipe.author_id),
+            },
+            "is_favorited": relations.is_favorited(recipe.pk),
+            "is_in_shopping_cart": relations.is_in_shopping_cart(recipe.pk),
+        })
+    return result
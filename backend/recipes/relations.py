@@ -0,0 +1,229 @@
+# recipes/relations.py
+
+import threading
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+from users.models import Subscription
+
+from .models import Favorite, ShoppingCart
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+FAVORITES = "favorites"
+CART = "cart"
+SUBSCRIPTIONS = "subscriptions"
+
+RELATIONS_KEY = "recipes:relations:{}:{}"
+# Changes with every write to a set: a set loaded from the database is
+# stored only if no write committed while it was loading.
+GENERATION_KEY = "recipes:relations-generation:{}:{}"
+
+
+def load(user_id, kind):
+    """Read one relation set of a user from the database."""
+    model, field = {
+        FAVORITES: (Favorite, "recipe_id"),
+        CART: (ShoppingCart, "recipe_id"),
+        SUBSCRIPTIONS: (Subscription, "author_id"),
+    }[kind]
+    return set(
+        model.objects.filter(user_id=user_id).values_list(field, flat=True))
+
+
+class DatabaseRelationStore:
+    """
+    Relation sets read from the database, one query per set and request.
+    Always current whatever the number of processes.
+    """
+
+    def get(self, user_id, kind):
+        return load(user_id, kind)
+
+    def generation(self, user_id, kind):
+        return None
+
+    def set(self, user_id, kind, members, generation):
+        pass
+
+    def change(self, user_id, kind, member, add):
+        pass
+
+
+class CacheRelationStore:
+    """
+    Relation sets kept in a Django cache. A write drops the cached set,
+    the next read loads it again.
+    """
+
+    def __init__(self, alias="default", timeout=60 * 60):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, user_id, kind):
+        key = RELATIONS_KEY.format(kind, user_id)
+        generation_key = GENERATION_KEY.format(kind, user_id)
+        found = self.cache.get_many([key, generation_key])
+        if key not in found:
+            return None
+        generation, members = found[key]
+        if generation != found.get(generation_key, ""):
+            return None
+        return members
+
+    def generation(self, user_id, kind):
+        return self.cache.get(GENERATION_KEY.format(kind, user_id), "")
+
+    def set(self, user_id, kind, members, generation):
+        # Tagged with the generation read before loading; a set loaded
+        # before a concurrent write is never returned by get().
+        self.cache.set(
+            RELATIONS_KEY.format(kind, user_id),
+            (generation, set(members)),
+            self.timeout,
+        )
+
+    def change(self, user_id, kind, member, add):
+        self.cache.set(
+            GENERATION_KEY.format(kind, user_id), uuid4().hex, self.timeout)
+        self.cache.delete(RELATIONS_KEY.format(kind, user_id))
+
+
+class RedisRelationStore:
+    """Relation sets kept as Redis sets, changed atomically in place."""
+
+    # Marks a loaded set, so an empty one still exists in Redis.
+    LOADED = "-"
+    # Start a new generation, change the set only if it is loaded.
+    CHANGE_SCRIPT = """
+    redis.call('set', KEYS[2], ARGV[3], 'EX', ARGV[4])
+    if redis.call('exists', KEYS[1]) == 1 then
+        return redis.call(ARGV[1], KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    # Store a loaded set only if no change started a new generation.
+    SET_SCRIPT = """
+    if (redis.call('get', KEYS[2]) or '') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('del', KEYS[1])
+    redis.call('sadd', KEYS[1], unpack(ARGV, 3))
+    redis.call('expire', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    def __init__(self, url, timeout=60 * 60):
+        if redis is None:
+            raise RuntimeError("RedisRelationStore requires redis-py.")
+        self.client = redis.Redis.from_url(url)
+        self.timeout = timeout
+        self.change_script = self.client.register_script(self.CHANGE_SCRIPT)
+        self.set_script = self.client.register_script(self.SET_SCRIPT)
+
+    def get(self, user_id, kind):
+        members = self.client.smembers(RELATIONS_KEY.format(kind, user_id))
+        if not members:
+            return None
+        return {int(member) for member in members
+                if member != self.LOADED.encode()}
+
+    def generation(self, user_id, kind):
+        generation = self.client.get(GENERATION_KEY.format(kind, user_id))
+        return generation.decode() if generation else ""
+
+    def set(self, user_id, kind, members, generation):
+        self.set_script(
+            keys=[RELATIONS_KEY.format(kind, user_id),
+                  GENERATION_KEY.format(kind, user_id)],
+            args=[generation, self.timeout, self.LOADED, *members],
+        )
+
+    def change(self, user_id, kind, member, add):
+        self.change_script(
+            keys=[RELATIONS_KEY.format(kind, user_id),
+                  GENERATION_KEY.format(kind, user_id)],
+            args=["sadd" if add else "srem", member,
+                  uuid4().hex, self.timeout],
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the configured relation store (settings.RELATION_STORE)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = settings.RELATION_STORE
+            _store = import_string(config["BACKEND"])(
+                **config.get("OPTIONS", {}))
+    return _store
+
+
+def get_relations(user_id, kind):
+    """Return a relation set of a user, loading it on first use."""
+    store = get_store()
+    members = store.get(user_id, kind)
+    if members is None:
+        # Read before loading, so a write committed meanwhile is noticed.
+        generation = store.generation(user_id, kind)
+        members = load(user_id, kind)
+        store.set(user_id, kind, members, generation)
+    return members
+
+
+def record(user_id, kind, member, add=True):
+    """Write a relation change through once the transaction commits."""
+    transaction.on_commit(
+        lambda: get_store().change(user_id, kind, member, add))
+
+
+class UserRelations:
+    """
+    Relation sets of the requesting user, fetched once per request, so
+    flags for a whole page are answered from memory.
+    """
+
+    def __init__(self, user):
+        self.user_id = user.pk if user.is_authenticated else None
+        self.loaded = {}
+
+    def members(self, kind):
+        if self.user_id is None:
+            return frozenset()
+        if kind not in self.loaded:
+            self.loaded[kind] = get_relations(self.user_id, kind)
+        return self.loaded[kind]
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.members(FAVORITES)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.members(CART)
+
+    def is_subscribed(self, author_id):
+        return author_id in self.members(SUBSCRIPTIONS)
+
+
+def for_request(request):
+    """Return the UserRelations of a request, creating it on first use."""
+    if request is None:
+        return UserRelations(AnonymousUser())
+    relations = getattr(request, "_relations", None)
+    if relations is None:
+        relations = request._relations = UserRelations(request.user)
+    return relations
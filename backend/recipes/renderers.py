@@ -0,0 +1,36 @@
+# recipes/renderers.py
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Select a shopping list format via content negotiation.
+
+    The list itself is streamed by the view, so only error payloads
+    ever reach render(); they go out as JSON with a JSON content type.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer = JSONRenderer()
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = renderer.media_type
+        return renderer.render(data, renderer.media_type, renderer_context)
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
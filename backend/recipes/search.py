@@ -0,0 +1,295 @@
+# recipes/search.py
+
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from .cache import INGREDIENTS_VERSION, get_version
+from .models import Ingredient
+
+NGRAM_SIZE = 3
+FUZZY_CANDIDATES_FACTOR = 5
+
+
+def fold(text):
+    """Normalize text for case-insensitive matching, including Cyrillic."""
+    return text.casefold().replace("ё", "е").strip()
+
+
+def ngrams(text):
+    """Return the set of padded character n-grams of text."""
+    padded = f" {text} "
+    return {
+        padded[i:i + NGRAM_SIZE]
+        for i in range(len(padded) - NGRAM_SIZE + 1)
+    }
+
+
+def prefix_distance(query, text, limit):
+    """
+    Smallest Levenshtein distance between query and any prefix of text,
+    or limit + 1 when it exceeds limit. Only the first len(query) + limit
+    characters of text can contribute.
+
+    Cells further than limit from the diagonal can't stay within limit,
+    so only that band of the matrix is computed.
+    """
+    over = limit + 1
+    size = len(text)
+    previous = [j if j <= limit else over for j in range(size + 1)]
+    for i, query_char in enumerate(query, 1):
+        low, high = max(1, i - limit), min(size, i + limit)
+        current = [over] * (size + 1)
+        current[0] = i if i <= limit else over
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (query_char != text[j - 1]),
+            )
+        if min(current) > limit:
+            return over
+        previous = current
+    return min(previous)
+
+
+class IngredientIndex:
+    """
+    In-memory ingredient search index.
+
+    Names are kept in a sorted array for prefix lookups and in an
+    n-gram index for infix and typo-tolerant lookups. Results are
+    ranked prefix matches first, then infix matches, then close
+    misspellings, each group ordered by name.
+    """
+
+    def __init__(self, ingredients):
+        rows = sorted(
+            (fold(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in ingredients
+        )
+        self.keys = [row[0] for row in rows]
+        self.items = [
+            {"id": pk, "name": name, "measurement_unit": measurement_unit}
+            for _, pk, name, measurement_unit in rows
+        ]
+        self.word_starts = [
+            [0] + [i + 1 for i, char in enumerate(key) if char == " "]
+            for key in self.keys
+        ]
+        self.postings = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for gram in ngrams(key):
+                self.postings[gram].append(position)
+
+    @classmethod
+    def from_database(cls):
+        return cls(Ingredient.objects.values_list(
+            "id", "name", "measurement_unit"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, limit=None):
+        """Return up to limit ingredients matching query, best first."""
+        query = fold(query)
+        if not query:
+            return []
+        if limit is None:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+
+        found = self.prefix_positions(query, limit)
+        if len(found) < limit:
+            found += self.infix_positions(query, limit - len(found), found)
+        if len(found) < limit:
+            found += self.fuzzy_positions(query, limit - len(found), found)
+        return [self.items[position] for position in found]
+
+    def prefix_positions(self, query, limit):
+        start = bisect_left(self.keys, query)
+        positions = []
+        for position in range(start, len(self.keys)):
+            if (len(positions) >= limit
+                    or not self.keys[position].startswith(query)):
+                break
+            positions.append(position)
+        return positions
+
+    def candidates(self, query):
+        """Count shared n-grams between query and every indexed name."""
+        shared = Counter()
+        for gram in ngrams(query):
+            shared.update(self.postings.get(gram, ()))
+        return shared
+
+    def infix_positions(self, query, limit, exclude):
+        exclude = set(exclude)
+        if len(query) < NGRAM_SIZE:
+            matches = (
+                position for position, key in enumerate(self.keys)
+                if query in key
+            )
+        else:
+            # Inner n-grams never touch padding, so a true infix match
+            # contains all of them.
+            inner = [
+                query[i:i + NGRAM_SIZE]
+                for i in range(len(query) - NGRAM_SIZE + 1)
+            ]
+            postings = sorted(
+                (set(self.postings.get(gram, ())) for gram in inner),
+                key=len,
+            )
+            matches = sorted(
+                set.intersection(*postings) if postings else set())
+            matches = (
+                position for position in matches
+                if query in self.keys[position]
+            )
+
+        positions = []
+        for position in matches:
+            if position in exclude:
+                continue
+            positions.append(position)
+            if len(positions) >= limit:
+                break
+        return positions
+
+    def fuzzy_positions(self, query, limit, exclude):
+        if len(query) < NGRAM_SIZE:
+            return []
+        max_distance = 1 if len(query) <= 5 else 2
+        exclude = set(exclude)
+        window = len(query) + max_distance
+        distances = {}
+        scored = []
+        # Names sharing the most n-grams are the likeliest misspellings,
+        # so only a bounded number of them is checked.
+        for position, shared in self.candidates(query).most_common(
+                limit * FUZZY_CANDIDATES_FACTOR):
+            if position in exclude:
+                continue
+            key = self.keys[position]
+            best = None
+            for start in self.word_starts[position]:
+                text = key[start:start + window]
+                if text not in distances:
+                    distances[text] = prefix_distance(
+                        query, text, max_distance)
+                # Matching the start of the name ranks above matching
+                # the start of a later word.
+                score = (distances[text], start > 0, -shared)
+                if best is None or score < best:
+                    best = score
+            if best[0] <= max_distance:
+                scored.append((best, position))
+        scored.sort()
+        return [position for _, position in scored[:limit]]
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index():
+    """
+    Return the worker-wide ingredient index, rebuilding it when the
+    ingredient catalog version has changed since it was built.
+    """
+    global _index, _index_version
+    version = get_version(INGREDIENTS_VERSION)
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = IngredientIndex.from_database()
+                _index_version = version
+    return _index
+
+
+def recipe_search_vector():
+    """Weighted document for recipe search: name (A) and text (B)."""
+    config = settings.RECIPE_SEARCH_CONFIG
+    return (
+        SearchVector("name", weight="A", config=config)
+        + SearchVector("text", weight="B", config=config)
+    )
+
+
+class PostgresRecipeSearch:
+    """Full-text recipe search over the GIN-indexed search_vector."""
+
+    def update(self, queryset):
+        queryset.update(search_vector=recipe_search_vector())
+
+    def filter(self, queryset, query):
+        search_query = SearchQuery(
+            query,
+            config=settings.RECIPE_SEARCH_CONFIG,
+            search_type="websearch",
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        ).order_by("-search_rank", "-pub_date", "-id")
+
+
+class PortableRecipeSearch:
+    """
+    Recipe search for databases without full-text support.
+
+    Every word must appear in the name or the text. Name matches weigh
+    more than text matches, mirroring the A/B weights on PostgreSQL.
+    """
+
+    name_weight = 1.0
+    text_weight = 0.4
+
+    def update(self, queryset):
+        pass
+
+    @staticmethod
+    def contains(field, word):
+        """
+        Case-insensitive containment. SQLite only folds ASCII case,
+        so common casings of the word are matched explicitly.
+        """
+        lookup = f"{field}__icontains"
+        condition = Q()
+        for form in {word, word.lower(), word.capitalize()}:
+            condition |= Q(**{lookup: form})
+        return condition
+
+    def filter(self, queryset, query):
+        words = query.split()
+        if not words:
+            return queryset.none()
+
+        rank = Value(0.0)
+        for word in words:
+            in_name = self.contains("name", word)
+            in_text = self.contains("text", word)
+            queryset = queryset.filter(in_name | in_text)
+            rank += Case(
+                When(in_name, then=Value(self.name_weight)),
+                default=Value(0.0),
+            ) + Case(
+                When(in_text, then=Value(self.text_weight)),
+                default=Value(0.0),
+            )
+        return queryset.annotate(
+            search_rank=rank * Value(1.0, output_field=FloatField())
+        ).order_by("-search_rank", "-pub_date", "-id")
+
+
+def get_recipe_search():
+    """Return the recipe search engine for the default database."""
+    if connection.vendor == "postgresql":
+        return PostgresRecipeSearch()
+    return PortableRecipeSearch()
@@ -1,13 +1,20 @@
 # recipes/serializers.py
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from users.serializers import CustomUserSerializer
 
+from . import cart, uploads
+from .cache import touch_recipes
+from .fields import UploadImageField
+from .images import image_url, variant_urls
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                      ShoppingCart, Tag, User)
+from .relations import for_request
+from .shopping_list import bump_recipe_cart_versions
+from .signals import replacing_ingredients
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -61,6 +68,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -73,6 +81,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
@@ -80,26 +89,21 @@ class RecipeSerializer(serializers.ModelSerializer):
     def get_image(self, obj):
         """Return full URL for image."""
         request = self.context.get("request")
-        if obj.image and hasattr(obj.image, "url"):
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return ""  # Return empty string if no image
+        return image_url(request, obj.image) or ""
+
+    def get_image_variants(self, obj):
+        """Return URLs of resized WebP and JPEG variants."""
+        return variant_urls(
+            self.context.get("request"), obj.image, obj.image_variants)
 
     def get_is_favorited(self, obj):
         """Check if recipe is in user's favorites."""
-        request = self.context.get("request")
-        if not request or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(user=request.user, recipe=obj).exists()
+        return for_request(self.context.get("request")).is_favorited(obj.pk)
 
     def get_is_in_shopping_cart(self, obj):
         """Check if recipe is in user's shopping cart."""
-        request = self.context.get("request")
-        if not request or request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=request.user, recipe=obj).exists()
+        return for_request(
+            self.context.get("request")).is_in_shopping_cart(obj.pk)
 
 
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
@@ -139,7 +143,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientWriteSerializer(
         many=True, write_only=True, required=True
     )
-    image = Base64ImageField()
+    image = UploadImageField()
 
     class Meta:
         model = Recipe
@@ -235,6 +239,17 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 )
             )
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        # bulk_create sends no signals, so refresh cached lists here
+        bump_recipe_cart_versions(recipe.id)
+
+    def save(self, **kwargs):
+        saved = False
+        try:
+            instance = super().save(**kwargs)
+            saved = True
+        finally:
+            uploads.finish(self.validated_data.values(), saved)
+        return instance
 
     @transaction.atomic
     def create(self, validated_data):
@@ -266,8 +281,16 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             instance.tags.set(tags)
 
         if ingredients_data is not None:
-            instance.recipe_ingredients.all().delete()
+            old_amounts = cart.recipe_amounts(instance.id)
+            with replacing_ingredients(instance.id):
+                instance.recipe_ingredients.all().delete()
             self.create_ingredients(instance, ingredients_data)
+            cart.change_recipe(
+                instance.id,
+                old_amounts,
+                {item["id"]: item["amount"] for item in ingredients_data},
+            )
+            touch_recipes(Recipe.objects.filter(pk=instance.id))
 
         return instance
 
@@ -276,19 +299,21 @@ class RecipeShortSerializer(serializers.ModelSerializer):
     """Serializer for simplified recipe representation in subscriptions."""
 
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
 
     def get_image(self, obj):
         """Return full URL for image as a string."""
         request = self.context.get("request")
-        if obj.image and hasattr(obj.image, "url"):
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return ""  # Return empty string if no image
+        return image_url(request, obj.image) or ""
+
+    def get_image_variants(self, obj):
+        """Return URLs of resized WebP and JPEG variants."""
+        return variant_urls(
+            self.context.get("request"), obj.image, obj.image_variants)
 
 
 class FavoriteCreateSerializer(serializers.ModelSerializer):
@@ -305,6 +330,10 @@ class FavoriteCreateSerializer(serializers.ModelSerializer):
             )
         ]
 
+    @transaction.atomic
+    def create(self, validated_data):
+        return super().create(validated_data)
+
 
 class FavoriteDeleteSerializer(serializers.Serializer):
     """Serializer for removing a recipe from favorites."""
@@ -341,6 +370,7 @@ class ShoppingCartCreateSerializer(serializers.Serializer):
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         return ShoppingCart.objects.create(**validated_data)
 
@@ -360,7 +390,21 @@ class ShoppingCartDeleteSerializer(serializers.Serializer):
 
         return data
 
+    @transaction.atomic
     def delete(self):
         user = self.validated_data['user']
         recipe = self.validated_data['recipe']
         ShoppingCart.objects.filter(user=user, recipe=recipe).delete()
+
+
+class UploadCreateSerializer(serializers.Serializer):
+    """Serializer for starting a chunked upload."""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value):
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                "Upload may not exceed "
+                f"{settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.")
+        return value
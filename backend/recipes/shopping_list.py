@@ -0,0 +1,157 @@
+# recipes/shopping_list.py
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageDraw, ImageFont
+
+from .cache import INGREDIENTS_VERSION, bump_version, get_version
+from .models import CartIngredient, ShoppingCart
+
+CACHE_KEY = "recipes:shopping_list:{}:{}:{}:{}"
+CACHE_TIMEOUT = 60 * 60 * 24
+CHUNK_SIZE = 64 * 1024
+TITLE = "Список покупок:"
+
+PAGE_SIZE = (827, 1169)
+PAGE_MARGIN = 60
+FONT_SIZE = 18
+LINE_HEIGHT = 28
+
+
+def cart_version_name(user_id):
+    return f"cart:{user_id}"
+
+
+def bump_cart_versions(user_ids):
+    """Invalidate the rendered shopping lists of the given users."""
+    for user_id in set(user_ids):
+        bump_version(cart_version_name(user_id))
+
+
+def bump_recipe_cart_versions(recipe_id):
+    """Invalidate shopping lists of everyone who has the recipe in cart."""
+    bump_cart_versions(
+        ShoppingCart.objects.filter(recipe_id=recipe_id)
+        .values_list("user_id", flat=True)
+    )
+
+
+def get_items(user):
+    """Return (name, measurement_unit, amount) rows of the user's cart."""
+    return list(
+        CartIngredient.objects.filter(user=user, total_amount__gt=0)
+        .values_list(
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "total_amount",
+        )
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+    )
+
+
+def render_txt(items):
+    yield f"{TITLE}\n".encode()
+    for name, measurement_unit, amount in items:
+        yield f"\n• {name} - {amount} {measurement_unit}".encode()
+
+
+def render_csv(items):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("name", "measurement_unit", "amount"))
+    for row in items:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def render_json(items):
+    yield b"["
+    for index, (name, measurement_unit, amount) in enumerate(items):
+        row = json.dumps(
+            {"name": name, "measurement_unit": measurement_unit,
+             "amount": amount},
+            ensure_ascii=False,
+        )
+        yield f"{',' if index else ''}{row}".encode()
+    yield b"]"
+
+
+def load_font():
+    try:
+        return ImageFont.truetype(settings.SHOPPING_LIST_FONT, FONT_SIZE)
+    except OSError:
+        # A size argument needs Pillow 10.1, the pinned 10.0 has only
+        # the small bitmap font.
+        return ImageFont.load_default()
+
+
+def render_pdf(items):
+    """Render the list onto A4 pages with Pillow, which ships with us."""
+    font = load_font()
+    lines = [TITLE, ""] + [
+        f"• {name} - {amount} {measurement_unit}"
+        for name, measurement_unit, amount in items
+    ]
+    per_page = (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // LINE_HEIGHT
+    pages = []
+    for start in range(0, len(lines), per_page):
+        page = Image.new("L", PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        for offset, line in enumerate(lines[start:start + per_page]):
+            draw.text(
+                (PAGE_MARGIN, PAGE_MARGIN + offset * LINE_HEIGHT),
+                line, font=font, fill=0)
+        pages.append(page)
+    buffer = io.BytesIO()
+    pages[0].save(buffer, "PDF", save_all=True,
+                  append_images=pages[1:], resolution=100)
+    yield buffer.getvalue()
+
+
+FORMATS = {
+    "txt": ("text/plain; charset=utf-8", render_txt),
+    "csv": ("text/csv; charset=utf-8", render_csv),
+    "json": ("application/json", render_json),
+    "pdf": ("application/pdf", render_pdf),
+}
+
+
+def cache_key(user, fmt):
+    """
+    Key of the rendered list for the current cart version.
+
+    Take the key before reading the cart: a change that lands in between
+    bumps the version, so the result is never cached as current.
+    """
+    return CACHE_KEY.format(
+        user.pk,
+        fmt,
+        get_version(cart_version_name(user.pk)),
+        get_version(INGREDIENTS_VERSION),
+    )
+
+
+def render_and_cache(key, fmt, items):
+    """
+    Yield the rendered list chunk by chunk and cache the full output
+    once the last chunk has been produced.
+    """
+    _, render = FORMATS[fmt]
+    chunks = []
+    for chunk in render(items):
+        chunks.append(chunk)
+        yield chunk
+    cache.set(key, b"".join(chunks), CACHE_TIMEOUT)
+
+
+def iter_chunks(content):
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE]
@@ -0,0 +1,100 @@
+# recipes/short_links.py
+
+import hashlib
+import string
+
+from django.conf import settings
+
+from .models import Recipe
+
+ALPHABET = string.digits + string.ascii_letters
+CODE_LENGTH = 6
+ID_BITS = 32
+HALF_BITS = ID_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+# Leads codes made of digits only, which would be taken for the recipe
+# ids of legacy /s/<id>/ links.
+DIGITS_MARK = "_"
+
+
+def round_keys():
+    digest = hashlib.blake2b(
+        settings.SHORT_LINK_SECRET.encode(), digest_size=2 * ROUNDS).digest()
+    return [int.from_bytes(digest[i:i + 2], "big")
+            for i in range(0, len(digest), 2)]
+
+
+_keys = None
+
+
+def keys():
+    global _keys
+    if _keys is None:
+        _keys = round_keys()
+    return _keys
+
+
+def mix(half, key):
+    return (((half ^ key) * 0x45D9F3B) >> 7) & HALF_MASK
+
+
+def permute(value, round_keys):
+    """Feistel network: a keyed bijection on 32-bit integers."""
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for key in round_keys:
+        left, right = right, left ^ mix(right, key)
+    return (left << HALF_BITS) | right
+
+
+def unpermute(value, round_keys):
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for key in reversed(round_keys):
+        left, right = right ^ mix(left, key), left
+    return (left << HALF_BITS) | right
+
+
+def encode(recipe_id):
+    """Return the opaque short code of a recipe id."""
+    if not 0 < recipe_id < 1 << ID_BITS:
+        raise ValueError(f"Recipe id out of range: {recipe_id}")
+    value = permute(recipe_id, keys())
+    code = ""
+    while value:
+        value, digit = divmod(value, len(ALPHABET))
+        code = ALPHABET[digit] + code
+    code = code.rjust(CODE_LENGTH, ALPHABET[0])
+    return DIGITS_MARK + code if code.isdigit() else code
+
+
+def decode(code):
+    """Return the recipe id of a short code, or None if it is malformed."""
+    if code.startswith(DIGITS_MARK):
+        code = code[len(DIGITS_MARK):]
+        if not code.isdigit():
+            return None
+    elif code.isdigit():
+        return None
+    if len(code) != CODE_LENGTH:
+        return None
+    value = 0
+    for char in code:
+        digit = ALPHABET.find(char)
+        if digit < 0:
+            return None
+        value = value * len(ALPHABET) + digit
+    if value >> ID_BITS:
+        return None
+    return unpermute(value, keys()) or None
+
+
+def recipe_exists(recipe_id):
+    return Recipe.objects.filter(pk=recipe_id).exists()
+
+
+def resolve(code):
+    """Return the id of an existing recipe for a short code, or None."""
+    recipe_id = decode(code)
+    if recipe_id is None or not recipe_exists(recipe_id):
+        return None
+    return recipe_id
@@ -0,0 +1,157 @@
+# recipes/signals.py
+
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import cart, feed, relations
+from .cache import (INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION,
+                    bump_version, invalidate_tag_slug_map, touch_recipes,
+                    user_version_name)
+from .images import schedule_variants, variants_saved
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import get_recipe_search
+from .shopping_list import bump_cart_versions, bump_recipe_cart_versions
+
+User = get_user_model()
+
+# Recipes whose ingredients are being replaced in this thread.
+_replacing = threading.local()
+
+
+def shift_counter(queryset, field, delta):
+    """
+    Atomically shift a counter column by delta.
+
+    The update runs as a single F() expression, so concurrent writers
+    never lose increments. Decrements never take a counter below zero.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    bump_version(user_version_name(instance.user_id))
+    if created:
+        relations.record(
+            instance.user_id, relations.FAVORITES, instance.recipe_id)
+        shift_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            "favorites_count", 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    bump_version(user_version_name(instance.user_id))
+    relations.record(
+        instance.user_id, relations.FAVORITES, instance.recipe_id, add=False)
+    shift_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), "favorites_count", -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(sender, instance, created, **kwargs):
+    bump_cart_versions([instance.user_id])
+    bump_version(user_version_name(instance.user_id))
+    if created:
+        relations.record(instance.user_id, relations.CART, instance.recipe_id)
+        cart.add_recipe(instance.user_id, instance.recipe_id)
+        shift_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            "in_carts_count", 1)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_deleting(sender, instance, **kwargs):
+    # Runs before cascades remove the recipe ingredients it subtracts.
+    cart.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, **kwargs):
+    bump_cart_versions([instance.user_id])
+    bump_version(user_version_name(instance.user_id))
+    relations.record(
+        instance.user_id, relations.CART, instance.recipe_id, add=False)
+    shift_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), "in_carts_count", -1)
+
+
+@contextmanager
+def replacing_ingredients(recipe_id):
+    """
+    Skip the per-row work of ingredient signals of a recipe; the caller
+    refreshes the recipe once when all rows are replaced.
+    """
+    recipe_ids = _replacing.__dict__.setdefault("recipe_ids", set())
+    recipe_ids.add(recipe_id)
+    try:
+        yield
+    finally:
+        recipe_ids.discard(recipe_id)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    if instance.recipe_id in getattr(_replacing, "recipe_ids", ()):
+        return
+    bump_recipe_cart_versions(instance.recipe_id)
+    touch_recipes(Recipe.objects.filter(pk=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif pk_set:
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+    else:
+        # post_clear from the tag side doesn't say which recipes.
+        bump_version(RECIPES_VERSION)
+
+
+@receiver(variants_saved, sender=Recipe)
+def recipe_variants_saved(sender, pk, **kwargs):
+    touch_recipes(Recipe.objects.filter(pk=pk))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    bump_version(RECIPES_VERSION)
+    get_recipe_search().update(Recipe.objects.filter(pk=instance.pk))
+    schedule_variants(instance, "image", "image_variants")
+    if created:
+        shift_counter(
+            User.objects.filter(pk=instance.author_id), "recipes_count", 1)
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    bump_version(RECIPES_VERSION)
+    shift_counter(
+        User.objects.filter(pk=instance.author_id), "recipes_count", -1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    invalidate_tag_slug_map()
+    bump_version(TAGS_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    bump_version(INGREDIENTS_VERSION)
@@ -0,0 +1,92 @@
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from rest_framework.test import APIClient
+from users.authentication import local_cache
+
+User = get_user_model()
+
+IMAGE_NAME = "recipes/images/test.jpg"
+
+
+def image_bytes(size=(64, 48), color=(230, 180, 120)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class FoodgramTestCase(TestCase):
+    """
+    Test case with its own local memory cache and media directory, so
+    no Redis is needed and no files are left behind. Variants render
+    inline.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix="foodgram-tests-")
+        isolated = override_settings(
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            }},
+            MEDIA_ROOT=cls.media_root,
+            CHUNKED_UPLOAD_ROOT=str(Path(cls.media_root, "uploads")),
+            IMAGE_PROCESSING_WORKERS=0,
+        )
+        isolated.enable()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, True)
+        cls.addClassCleanup(isolated.disable)
+        super().setUpClass()
+        if not default_storage.exists(IMAGE_NAME):
+            default_storage.save(IMAGE_NAME, ContentFile(image_bytes()))
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    @staticmethod
+    def create_user(name, **fields):
+        return User.objects.create_user(
+            username=name, email=f"{name}@example.com",
+            first_name=name.title(), last_name="Test",
+            password="foodgram-password", **fields)
+
+    @staticmethod
+    def create_ingredients(count, unit="g"):
+        return [
+            Ingredient.objects.create(
+                name=f"Ingredient {index}", measurement_unit=unit)
+            for index in range(count)
+        ]
+
+    @staticmethod
+    def create_recipe(author, name="Recipe", ingredients=(), tags=(),
+                      **fields):
+        """Create a recipe; ingredients are (ingredient, amount) pairs."""
+        fields.setdefault("text", "Text")
+        fields.setdefault("cooking_time", 10)
+        recipe = Recipe.objects.create(
+            author=author, name=name, image=IMAGE_NAME, **fields)
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in ingredients
+        )
+        return recipe
+
+    @staticmethod
+    def client_for(user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes import cart
+from recipes.models import (CartIngredient, Ingredient, RecipeIngredient,
+                            ShoppingCart, Tag)
+
+from .base import FoodgramTestCase
+
+
+class CartTotalsTest(FoodgramTestCase):
+    """Per-ingredient cart totals kept in step with carts and recipes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.buyers = [cls.create_user(f"buyer{index}") for index in range(2)]
+        cls.tag = Tag.objects.create(name="Lunch", slug="lunch")
+        cls.flour, cls.milk, cls.eggs = (
+            Ingredient.objects.create(name=name, measurement_unit="g")
+            for name in ("flour", "milk", "eggs"))
+        cls.pancakes = cls.create_recipe(
+            cls.author, "Pancakes", tags=[cls.tag],
+            ingredients=[(cls.flour, 200), (cls.milk, 500)])
+        cls.bread = cls.create_recipe(
+            cls.author, "Bread", tags=[cls.tag],
+            ingredients=[(cls.flour, 300)])
+
+    def totals(self, user):
+        return dict(
+            CartIngredient.objects.filter(user=user)
+            .values_list("ingredient__name", "total_amount"))
+
+    def add(self, user, recipe):
+        response = self.client_for(user).post(
+            f"/api/v1/recipes/{recipe.pk}/shopping_cart/")
+        self.assertEqual(response.status_code, 201)
+
+    def test_adding_and_removing_recipes(self):
+        buyer = self.buyers[0]
+        self.add(buyer, self.pancakes)
+        self.add(buyer, self.bread)
+        self.assertEqual(self.totals(buyer), {"flour": 500, "milk": 500})
+        response = self.client_for(buyer).delete(
+            f"/api/v1/recipes/{self.pancakes.pk}/shopping_cart/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.totals(buyer), {"flour": 300})
+
+    def replace_ingredients(self, recipe, ingredients):
+        response = self.client_for(self.author).patch(
+            f"/api/v1/recipes/{recipe.pk}/",
+            {
+                "name": recipe.name,
+                "text": "Text",
+                "cooking_time": 10,
+                "tags": [self.tag.pk],
+                "ingredients": [
+                    {"id": ingredient.pk, "amount": amount}
+                    for ingredient, amount in ingredients
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_replacing_ingredients_updates_every_cart(self):
+        for buyer in self.buyers:
+            self.add(buyer, self.pancakes)
+            self.add(buyer, self.bread)
+        self.replace_ingredients(
+            self.pancakes, [(self.flour, 250), (self.eggs, 2)])
+        for buyer in self.buyers:
+            self.assertEqual(self.totals(buyer), {"flour": 550, "eggs": 2})
+        self.assertEqual(cart.stored_totals(), cart.actual_totals())
+
+    def test_replaced_rows_cost_no_extra_updates(self):
+        def recipe_updates():
+            with CaptureQueriesContext(connection) as queries:
+                self.replace_ingredients(self.bread, [(self.flour, 100)])
+            return sum(
+                query["sql"].startswith('UPDATE "recipes_recipe"')
+                for query in queries.captured_queries)
+
+        few = recipe_updates()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=self.bread, ingredient=ingredient,
+                             amount=1)
+            for ingredient in self.create_ingredients(10))
+        self.assertEqual(recipe_updates(), few)
+
+    def test_deleted_recipe_leaves_the_totals(self):
+        buyer = self.buyers[0]
+        self.add(buyer, self.pancakes)
+        self.add(buyer, self.bread)
+        self.pancakes.delete()
+        self.assertEqual(self.totals(buyer), {"flour": 300})
+
+    def test_rebuild_repairs_drift(self):
+        buyer = self.buyers[0]
+        ShoppingCart.objects.create(user=buyer, recipe=self.pancakes)
+        CartIngredient.objects.filter(
+            user=buyer, ingredient=self.milk).update(total_amount=1)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_cart_totals", check=True, stdout=StringIO())
+        call_command("rebuild_cart_totals", stdout=StringIO())
+        self.assertEqual(self.totals(buyer), {"flour": 200, "milk": 500})
+        call_command("rebuild_cart_totals", check=True, stdout=StringIO())
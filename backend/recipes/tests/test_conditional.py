@@ -0,0 +1,87 @@
+from recipes.models import Favorite, Ingredient, Tag
+
+from .base import FoodgramTestCase
+
+
+class ConditionalGetTest(FoodgramTestCase):
+    """ETag and Last-Modified answer repeated reads with 304."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.reader = cls.create_user("reader")
+        cls.tag = Tag.objects.create(name="Lunch", slug="lunch")
+        cls.ingredient, = cls.create_ingredients(1)
+        cls.recipe = cls.create_recipe(
+            cls.author, tags=[cls.tag], ingredients=[(cls.ingredient, 5)])
+
+    def get(self, url, user=None, **headers):
+        return self.client_for(user).get(url, **headers)
+
+    def assert_revalidates(self, url, change, user=None):
+        """304 for the current ETag, 200 and a new ETag after change()."""
+        first = self.get(url, user)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(
+            self.get(url, user, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        second = self.get(url, user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], etag)
+
+    def test_recipe_list(self):
+        self.assert_revalidates(
+            "/api/v1/recipes/",
+            lambda: self.create_recipe(self.author, "New"))
+
+    def test_recipe_detail(self):
+        def rename():
+            self.recipe.name = "Renamed"
+            self.recipe.save()
+
+        self.assert_revalidates(f"/api/v1/recipes/{self.recipe.pk}/", rename)
+
+    def test_recipe_detail_follows_the_readers_relations(self):
+        self.assert_revalidates(
+            f"/api/v1/recipes/{self.recipe.pk}/",
+            lambda: Favorite.objects.create(
+                user=self.reader, recipe=self.recipe),
+            user=self.reader)
+
+    def test_recipe_detail_follows_its_author(self):
+        def rename_author():
+            self.author.first_name = "Renamed"
+            self.author.save()
+
+        self.assert_revalidates(
+            f"/api/v1/recipes/{self.recipe.pk}/", rename_author)
+
+    def test_tags(self):
+        self.assert_revalidates(
+            "/api/v1/tags/",
+            lambda: Tag.objects.create(name="Dinner", slug="dinner"))
+
+    def test_ingredients(self):
+        self.assert_revalidates(
+            "/api/v1/ingredients/",
+            lambda: Ingredient.objects.create(
+                name="Salt", measurement_unit="g"))
+
+    def test_if_modified_since(self):
+        url = f"/api/v1/recipes/{self.recipe.pk}/"
+        last_modified = self.get(url)["Last-Modified"]
+        self.assertEqual(
+            self.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code,
+            304)
+
+    def test_etag_depends_on_the_user(self):
+        url = f"/api/v1/recipes/{self.recipe.pk}/"
+        etag = self.get(url)["ETag"]
+        response = self.get(url, self.reader, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Authorization", response["Vary"])
+
+    def test_missing_recipe(self):
+        response = self.get("/api/v1/recipes/0/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,63 @@
+from recipes.models import Recipe
+from recipes.signals import shift_counter
+
+from .base import FoodgramTestCase, User
+
+
+class RecipeCountersTest(FoodgramTestCase):
+    """Denormalized counters follow favorites, carts and recipes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.readers = [cls.create_user(f"reader{index}") for index in range(3)]
+        cls.recipe = cls.create_recipe(cls.author)
+
+    def counters(self):
+        self.recipe.refresh_from_db()
+        return self.recipe.favorites_count, self.recipe.in_carts_count
+
+    def toggle(self, user, action, method):
+        response = getattr(self.client_for(user), method)(
+            f"/api/v1/recipes/{self.recipe.pk}/{action}/")
+        self.assertIn(response.status_code, (201, 204))
+
+    def test_favorites_count(self):
+        for reader in self.readers:
+            self.toggle(reader, "favorite", "post")
+        self.assertEqual(self.counters(), (3, 0))
+        self.toggle(self.readers[0], "favorite", "delete")
+        self.assertEqual(self.counters(), (2, 0))
+
+    def test_in_carts_count(self):
+        for reader in self.readers[:2]:
+            self.toggle(reader, "shopping_cart", "post")
+        self.assertEqual(self.counters(), (0, 2))
+        self.toggle(self.readers[1], "shopping_cart", "delete")
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_duplicate_favorite_is_not_counted(self):
+        self.toggle(self.readers[0], "favorite", "post")
+        response = self.client_for(self.readers[0]).post(
+            f"/api/v1/recipes/{self.recipe.pk}/favorite/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_recipes_count(self):
+        recipe = self.create_recipe(self.author, name="Second")
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+        response = self.client_for(self.author).delete(
+            f"/api/v1/recipes/{recipe.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+
+    def test_shift_counter_stops_at_zero(self):
+        recipes = Recipe.objects.filter(pk=self.recipe.pk)
+        shift_counter(recipes, "favorites_count", -1)
+        self.assertEqual(self.counters(), (0, 0))
+        users = User.objects.filter(pk=self.author.pk)
+        shift_counter(users, "subscribers_count", -1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from recipes.models import FeedEntry
+from users.models import Subscription
+
+from .base import FoodgramTestCase
+
+URL = "/api/v1/recipes/feed/"
+
+
+class FeedTest(FoodgramTestCase):
+    """Feeds list the followed authors' recipes, newest first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = cls.create_user("reader")
+        cls.stranger = cls.create_user("stranger")
+        cls.author = cls.create_user("author")
+        cls.other = cls.create_user("other")
+        cls.old = cls.create_recipe(cls.author, "Old")
+
+    def subscribe(self, user, author, method="post"):
+        response = getattr(self.client_for(user), method)(
+            f"/api/v1/users/{author.pk}/subscribe/")
+        self.assertIn(response.status_code, (201, 204))
+
+    def feed(self, user=None, limit=None):
+        """Names of the whole feed, following every next link."""
+        names = []
+        url = URL if limit is None else f"{URL}?limit={limit}"
+        while url:
+            response = self.client_for(user or self.reader).get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [recipe["name"] for recipe in response.data["results"]]
+            url = response.data["next"]
+        return names
+
+    def test_subscribing_backfills_the_timeline(self):
+        self.assertEqual(self.feed(), [])
+        self.subscribe(self.reader, self.author)
+        self.assertEqual(self.feed(), ["Old"])
+
+    def test_new_recipes_fan_out_to_subscribers(self):
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.reader, self.other)
+        self.create_recipe(self.other, "Other")
+        self.create_recipe(self.author, "New")
+        self.assertEqual(self.feed(), ["New", "Other", "Old"])
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(self.feed(self.stranger), [])
+
+    def test_unsubscribing_empties_the_timeline(self):
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.reader, self.author, "delete")
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    def test_cursor_pages(self):
+        self.subscribe(self.reader, self.author)
+        for index in range(4):
+            self.create_recipe(self.author, f"New {index}")
+        self.assertEqual(
+            self.feed(limit=2),
+            ["New 3", "New 2", "New 1", "New 0", "Old"])
+
+    def test_invalid_cursor(self):
+        response = self.client_for(self.reader).get(f"{URL}?cursor=abc")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(FEED_LENGTH=2)
+    def test_timelines_are_trimmed(self):
+        self.subscribe(self.reader, self.author)
+        for index in range(3):
+            self.create_recipe(self.author, f"New {index}")
+        self.assertEqual(self.feed(), ["New 2", "New 1"])
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_popular_authors_are_merged_on_read(self):
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.stranger, self.author)
+        self.subscribe(self.reader, self.other)
+        self.create_recipe(self.author, "Popular")
+        self.create_recipe(self.other, "Other")
+        self.assertFalse(FeedEntry.objects.filter(
+            recipe__name="Popular").exists())
+        self.assertEqual(self.feed(), ["Other", "Popular", "Old"])
+        self.assertEqual(self.feed(self.stranger), ["Popular", "Old"])
+        # Back under the limit, the recipe is copied to the timelines.
+        self.subscribe(self.stranger, self.author, "delete")
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, recipe__name="Popular").exists())
+        self.assertEqual(self.feed(), ["Other", "Popular", "Old"])
+
+    def test_rebuild(self):
+        Subscription.objects.bulk_create(
+            [Subscription(user=self.reader, author=self.author)])
+        self.assertEqual(self.feed(), [])
+        call_command("rebuild_feeds", stdout=StringIO())
+        self.assertEqual(self.feed(), ["Old"])
+
+    def test_generated_data_has_feeds(self):
+        call_command("generate_data", users=20, recipes=100, seed=7,
+                     stdout=StringIO())
+        self.assertTrue(FeedEntry.objects.filter(
+            user__username__startswith="gen7_").exists())
@@ -0,0 +1,57 @@
+from django.test import override_settings
+from recipes.models import Ingredient
+
+from .base import FoodgramTestCase
+
+NAMES = [
+    "молоко", "молоко сгущенное", "кокосовое молоко", "мука", "мёд",
+    "сахар", "сахарная пудра", "соль",
+]
+
+
+class IngredientSearchTest(FoodgramTestCase):
+    """Ingredient autocomplete: prefix, then infix, then misspellings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in NAMES:
+            Ingredient.objects.create(name=name, measurement_unit="г")
+
+    def search(self, name):
+        response = self.client_for().get(
+            "/api/v1/ingredients/", {"name": name})
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.data]
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(
+            self.search("молоко"),
+            ["молоко", "молоко сгущенное", "кокосовое молоко"])
+
+    def test_case_and_yo_are_folded(self):
+        self.assertEqual(self.search("САХ"), ["сахар", "сахарная пудра"])
+        self.assertEqual(self.search("мед"), ["мёд"])
+
+    def test_infix(self):
+        self.assertEqual(self.search("пудр"), ["сахарная пудра"])
+
+    def test_misspelling(self):
+        self.assertIn("сахар", self.search("сохар"))
+        self.assertIn("молоко", self.search("малоко"))
+
+    def test_items_carry_id_and_unit(self):
+        response = self.client_for().get(
+            "/api/v1/ingredients/", {"name": "соль"})
+        salt = Ingredient.objects.get(name="соль")
+        self.assertEqual(
+            response.data,
+            [{"id": salt.pk, "name": "соль", "measurement_unit": "г"}])
+
+    @override_settings(INGREDIENT_SEARCH_LIMIT=2)
+    def test_limit(self):
+        self.assertEqual(self.search("мо"), ["молоко", "молоко сгущенное"])
+
+    def test_new_ingredient_is_found(self):
+        self.assertEqual(self.search("соль"), ["соль"])
+        Ingredient.objects.create(name="соль морская", measurement_unit="г")
+        self.assertEqual(self.search("соль"), ["соль", "соль морская"])
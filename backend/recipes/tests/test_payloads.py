@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorite, ShoppingCart, Tag
+from users.models import Subscription
+
+from .base import FoodgramTestCase
+
+
+class PayloadCacheTest(FoodgramTestCase):
+    """Cached recipe payloads never outlive the data they show."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.reader = cls.create_user("reader")
+        cls.tag = Tag.objects.create(name="Lunch", slug="lunch")
+        cls.ingredient, = cls.create_ingredients(1)
+        cls.recipes = [
+            cls.create_recipe(
+                cls.author, f"Recipe {index}", tags=[cls.tag],
+                ingredients=[(cls.ingredient, index + 1)])
+            for index in range(3)
+        ]
+        cls.recipe = cls.recipes[0]
+
+    def detail(self, user=None):
+        response = self.client_for(user).get(
+            f"/api/v1/recipes/{self.recipe.pk}/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.reader).get("/api/v1/recipes/")
+        self.assertEqual(len(response.data["results"]), 3)
+        return len(queries)
+
+    def test_cached_pages_skip_serialization(self):
+        cold = self.list_queries()
+        warm = self.list_queries()
+        self.assertLess(warm, cold)
+        self.recipe.name = "Renamed"
+        self.recipe.save()
+        self.assertGreater(self.list_queries(), warm)
+        self.assertEqual(self.list_queries(), warm)
+
+    def test_recipe_edit(self):
+        self.detail()
+        self.recipe.name = "Renamed"
+        self.recipe.save()
+        self.assertEqual(self.detail()["name"], "Renamed")
+
+    def test_author_edit(self):
+        self.detail()
+        self.author.first_name = "Renamed"
+        self.author.save()
+        self.assertEqual(self.detail()["author"]["first_name"], "Renamed")
+
+    def test_tag_and_ingredient_edits(self):
+        self.detail()
+        self.tag.name = "Dinner"
+        self.tag.save()
+        self.ingredient.name = "Salt"
+        self.ingredient.save()
+        data = self.detail()
+        self.assertEqual(data["tags"][0]["name"], "Dinner")
+        self.assertEqual(data["ingredients"][0]["name"], "Salt")
+
+    def test_flags_are_per_user(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.recipe)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        anonymous = self.detail()
+        reader = self.detail(self.reader)
+        author = self.detail(self.author)
+        self.assertTrue(reader["is_favorited"])
+        self.assertTrue(reader["is_in_shopping_cart"])
+        self.assertTrue(reader["author"]["is_subscribed"])
+        for data in (anonymous, author):
+            self.assertFalse(data["is_favorited"])
+            self.assertFalse(data["is_in_shopping_cart"])
+            self.assertFalse(data["author"]["is_subscribed"])
+
+    def test_deleted_recipe_leaves_the_list(self):
+        self.client_for().get("/api/v1/recipes/")
+        self.recipes[1].delete()
+        response = self.client_for().get("/api/v1/recipes/")
+        self.assertEqual(
+            sorted(recipe["name"] for recipe in response.data["results"]),
+            ["Recipe 0", "Recipe 2"])
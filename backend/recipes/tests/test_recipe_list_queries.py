@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from rest_framework.test import APIClient
+from users.models import Subscription
+
+from .base import FoodgramTestCase, User
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    """The recipe list costs the same queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", email="reader@example.com",
+            first_name="Reader", last_name="Reader", password="password")
+        authors = [
+            User.objects.create_user(
+                username=f"author{index}", email=f"author{index}@example.com",
+                first_name="Author", last_name="Author", password="password")
+            for index in range(5)
+        ]
+        tags = [
+            Tag.objects.create(name=f"Tag {index}", slug=f"tag{index}")
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f"Ingredient {index}", measurement_unit="g")
+            for index in range(5)
+        ]
+        for index in range(60):
+            recipe = Recipe.objects.create(
+                author=authors[index % len(authors)],
+                name=f"Recipe {index}",
+                image="recipes/images/recipe.jpg",
+                text="Text",
+                cooking_time=10,
+            )
+            recipe.tags.set(tags[:index % len(tags) + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=index + 1)
+                for ingredient in ingredients[:3]
+            )
+            if index % 3 == 0:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if index % 4 == 0:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        for author in authors[:3]:
+            Subscription.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def list_recipes(self, limit, queries):
+        # Nothing served from the payload or relation caches.
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = self.client.get(f"/api/v1/recipes/?limit={limit}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), limit)
+        return response.data["results"]
+
+    def test_query_count_is_flat(self):
+        self.list_recipes(5, 9)
+        results = self.list_recipes(50, 9)
+        self.assertTrue(any(
+            recipe["is_favorited"] for recipe in results))
+        self.assertTrue(any(
+            recipe["is_in_shopping_cart"] for recipe in results))
+        self.assertTrue(any(
+            recipe["author"]["is_subscribed"] for recipe in results))
@@ -0,0 +1,46 @@
+from .base import FoodgramTestCase
+
+
+class RecipeSearchTest(FoodgramTestCase):
+    """Full-text search by name and text, name matches ranked first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.in_text = cls.create_recipe(
+            cls.author, "Салат", text="Подавать с тыквенным супом.")
+        cls.in_name = cls.create_recipe(
+            cls.author, "Тыквенный суп", text="Запечь и протереть.")
+        cls.other = cls.create_recipe(
+            cls.author, "Борщ", text="Свекла и капуста.")
+
+    def search(self, query, **params):
+        response = self.client_for().get(
+            "/api/v1/recipes/", {"search": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [recipe["name"] for recipe in response.data["results"]]
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(self.search("суп"), ["Тыквенный суп", "Салат"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search("борщ свекла"), ["Борщ"])
+        self.assertEqual(self.search("борщ тыквенный"), [])
+
+    def test_edited_recipe_is_found(self):
+        self.other.name = "Борщ с супом"
+        self.other.save()
+        self.assertEqual(self.search("борщ суп"), ["Борщ с супом"])
+
+    def test_search_combines_with_filters(self):
+        self.assertEqual(
+            self.search("суп", author=self.author.pk),
+            ["Тыквенный суп", "Салат"])
+        stranger = self.create_user("stranger")
+        self.assertEqual(self.search("суп", author=stranger.pk), [])
+
+    def test_cursor_is_rejected(self):
+        response = self.client_for().get(
+            "/api/v1/recipes/", {"search": "суп", "cursor": ""})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("search", response.data)
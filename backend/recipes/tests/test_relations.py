@@ -0,0 +1,101 @@
+from unittest import mock
+
+from recipes import relations
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+from .base import FoodgramTestCase
+
+
+class RelationStoreTests:
+    """Behaviour shared by every relation store, see store()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.reader = cls.create_user("reader")
+        cls.recipe = cls.create_recipe(cls.author)
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(relations, "_store", self.store())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flags(self):
+        response = self.client_for(self.reader).get(
+            f"/api/v1/recipes/{self.recipe.pk}/")
+        return (response.data["is_favorited"],
+                response.data["is_in_shopping_cart"],
+                response.data["author"]["is_subscribed"])
+
+    def toggle(self, method):
+        client = self.client_for(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            for url in (f"/api/v1/recipes/{self.recipe.pk}/favorite/",
+                        f"/api/v1/recipes/{self.recipe.pk}/shopping_cart/",
+                        f"/api/v1/users/{self.author.pk}/subscribe/"):
+                self.assertIn(
+                    getattr(client, method)(url).status_code, (201, 204))
+
+    def test_flags_follow_changes(self):
+        self.assertEqual(self.flags(), (False, False, False))
+        self.toggle("post")
+        self.assertEqual(self.flags(), (True, True, True))
+        self.toggle("delete")
+        self.assertEqual(self.flags(), (False, False, False))
+
+    def test_sets_are_per_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.author, recipe=self.recipe)
+        self.assertEqual(
+            relations.get_relations(self.author.pk, relations.FAVORITES),
+            {self.recipe.pk})
+        self.assertEqual(
+            relations.get_relations(self.reader.pk, relations.FAVORITES),
+            set())
+
+    def test_one_read_per_set_and_request(self):
+        other = self.create_recipe(self.author, "Other")
+        ShoppingCart.objects.create(user=self.reader, recipe=other)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        user_relations = relations.UserRelations(self.reader)
+        with self.assertNumQueries(3):
+            self.assertFalse(user_relations.is_favorited(self.recipe.pk))
+            self.assertTrue(user_relations.is_in_shopping_cart(other.pk))
+            self.assertTrue(user_relations.is_subscribed(self.author.pk))
+            user_relations.is_favorited(other.pk)
+        queries = 3 if self.loads_every_request else 0
+        with self.assertNumQueries(queries):
+            user_relations = relations.UserRelations(self.reader)
+            user_relations.is_favorited(self.recipe.pk)
+            user_relations.is_in_shopping_cart(other.pk)
+            user_relations.is_subscribed(self.author.pk)
+
+
+class DatabaseRelationStoreTest(RelationStoreTests, FoodgramTestCase):
+    loads_every_request = True
+
+    def store(self):
+        return relations.DatabaseRelationStore()
+
+
+class CacheRelationStoreTest(RelationStoreTests, FoodgramTestCase):
+    loads_every_request = False
+
+    def store(self):
+        return relations.CacheRelationStore()
+
+    def test_set_loaded_before_a_write_is_not_kept(self):
+        store = relations.get_store()
+        # A reader reads the generation and loads the set...
+        generation = store.generation(self.reader.pk, relations.FAVORITES)
+        loaded = relations.load(self.reader.pk, relations.FAVORITES)
+        # ...while a favorite commits...
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        # ...and only then stores what it loaded.
+        store.set(self.reader.pk, relations.FAVORITES, loaded, generation)
+        self.assertEqual(
+            relations.get_relations(self.reader.pk, relations.FAVORITES),
+            {self.recipe.pk})
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+
+from django.test import override_settings
+from PIL import ImageFont
+from recipes import shopping_list
+from recipes.models import Ingredient, ShoppingCart
+
+from .base import FoodgramTestCase
+
+URL = "/api/v1/recipes/download_shopping_cart/"
+
+
+class ShoppingListTest(FoodgramTestCase):
+    """The shopping list in every format, summed over the cart."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("cook")
+        cls.flour = Ingredient.objects.create(
+            name="Мука", measurement_unit="г")
+        cls.milk = Ingredient.objects.create(
+            name="Молоко", measurement_unit="мл")
+        cls.pancakes = cls.create_recipe(
+            cls.user, "Блины",
+            ingredients=[(cls.flour, 200), (cls.milk, 500)])
+        cls.bread = cls.create_recipe(
+            cls.user, "Хлеб", ingredients=[(cls.flour, 300)])
+        for recipe in (cls.pancakes, cls.bread):
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def download(self, fmt=None, **headers):
+        query = {"format": fmt} if fmt else {}
+        response = self.client_for(self.user).get(URL, query, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_txt(self):
+        response, content = self.download("txt")
+        self.assertEqual(
+            response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            "attachment; filename=shopping_list.txt")
+        self.assertEqual(
+            content.decode(),
+            "Список покупок:\n\n• Молоко - 500 мл\n• Мука - 500 г")
+
+    def test_csv(self):
+        response, content = self.download("csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows, [
+            ["name", "measurement_unit", "amount"],
+            ["Молоко", "мл", "500"],
+            ["Мука", "г", "500"],
+        ])
+
+    def test_json(self):
+        response, content = self.download("json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(content), [
+            {"name": "Молоко", "measurement_unit": "мл", "amount": 500},
+            {"name": "Мука", "measurement_unit": "г", "amount": 500},
+        ])
+
+    def test_pdf(self):
+        response, content = self.download("pdf")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
+
+    def test_accept_header(self):
+        response, _ = self.download(HTTP_ACCEPT="text/csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+
+    def test_cached_list_follows_cart_changes(self):
+        _, first = self.download("txt")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.download("txt")[1], first)
+        ShoppingCart.objects.filter(recipe=self.bread).delete()
+        _, content = self.download("txt")
+        self.assertIn("• Мука - 200 г", content.decode())
+        self.assertNotEqual(content, first)
+
+    def test_empty_cart_errors_are_json(self):
+        ShoppingCart.objects.filter(user=self.user).delete()
+        for fmt in ("txt", "csv", "json", "pdf"):
+            response = self.client_for(self.user).get(URL, {"format": fmt})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(
+                json.loads(response.content),
+                {"errors": "Shopping cart is empty"})
+
+    @override_settings(SHOPPING_LIST_FONT="missing-font.ttf")
+    def test_pdf_without_the_font(self):
+        self.assertIsInstance(
+            shopping_list.load_font(),
+            (ImageFont.ImageFont, ImageFont.FreeTypeFont))
+        _, content = self.download("pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
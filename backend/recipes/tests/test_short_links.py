@@ -0,0 +1,76 @@
+from django.test import SimpleTestCase
+from recipes import short_links
+
+from .base import FoodgramTestCase
+
+
+class ShortCodeTest(SimpleTestCase):
+    """Short codes are opaque, reversible and never only digits."""
+
+    def test_round_trip(self):
+        ids = [*range(1, 5000), 123_456_789, (1 << 32) - 1]
+        codes = [short_links.encode(recipe_id) for recipe_id in ids]
+        self.assertEqual(len(set(codes)), len(ids))
+        for recipe_id, code in zip(ids, codes):
+            self.assertFalse(code.isdigit())
+            self.assertEqual(short_links.decode(code), recipe_id)
+
+    def test_digit_codes_are_marked(self):
+        marked = next(
+            code for code in map(short_links.encode, range(1, 100_000))
+            if code.startswith(short_links.DIGITS_MARK))
+        self.assertTrue(marked[1:].isdigit())
+        self.assertIsNotNone(short_links.decode(marked))
+        self.assertIsNone(short_links.decode(marked[1:]))
+
+    def test_malformed_codes(self):
+        code = short_links.encode(42)
+        for malformed in ("", "abc", code + "a", code[:-1] + "!", "_abc12",
+                          "zzzzzz"):
+            self.assertNotEqual(short_links.decode(malformed), 42)
+        self.assertIsNone(short_links.decode("!!!!!!"))
+
+    def test_out_of_range(self):
+        for recipe_id in (0, -1, 1 << 32):
+            with self.assertRaises(ValueError):
+                short_links.encode(recipe_id)
+
+
+class ShortLinkTest(FoodgramTestCase):
+    """get-link hands out short links that redirect to the recipe."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.recipe = cls.create_recipe(cls.author)
+
+    def test_round_trip(self):
+        response = self.client_for().get(
+            f"/api/v1/recipes/{self.recipe.pk}/get-link/")
+        self.assertEqual(response.status_code, 200)
+        short_link = response.data["short-link"]
+        self.assertTrue(short_link.startswith("http://testserver/s/"))
+        response = self.client.get(short_link)
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], f"/recipes/{self.recipe.pk}/")
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_legacy_numeric_link(self):
+        response = self.client.get(f"/s/{self.recipe.pk}/")
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], f"/recipes/{self.recipe.pk}/")
+
+    def test_missing_recipes(self):
+        recipe_id = self.recipe.pk
+        code = short_links.encode(recipe_id)
+        self.assertEqual(
+            self.client_for().get("/api/v1/recipes/0/get-link/").status_code,
+            404)
+        self.assertEqual(self.client.get("/s/abc/").status_code, 404)
+        self.recipe.delete()
+        self.assertEqual(self.client.get(f"/s/{code}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/s/{recipe_id}/").status_code, 404)
+
+    def test_only_safe_methods(self):
+        code = short_links.encode(self.recipe.pk)
+        self.assertEqual(self.client.post(f"/s/{code}/").status_code, 405)
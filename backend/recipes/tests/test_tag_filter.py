@@ -0,0 +1,46 @@
+from recipes.models import Tag
+
+from .base import FoodgramTestCase
+
+
+class TagFilterTest(FoodgramTestCase):
+    """Recipes filtered by tag slugs, any of the given tags matches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.breakfast = Tag.objects.create(name="Breakfast", slug="breakfast")
+        cls.lunch = Tag.objects.create(name="Lunch", slug="lunch")
+        cls.dinner = Tag.objects.create(name="Dinner", slug="dinner")
+        cls.both = cls.create_recipe(
+            cls.author, "Both", tags=[cls.breakfast, cls.lunch])
+        cls.morning = cls.create_recipe(
+            cls.author, "Morning", tags=[cls.breakfast])
+        cls.evening = cls.create_recipe(
+            cls.author, "Evening", tags=[cls.dinner])
+
+    def names(self, query):
+        response = self.client_for().get(f"/api/v1/recipes/?{query}")
+        self.assertEqual(response.status_code, 200)
+        names = [recipe["name"] for recipe in response.data["results"]]
+        self.assertEqual(response.data["count"], len(names))
+        return sorted(names)
+
+    def test_single_tag(self):
+        self.assertEqual(self.names("tags=breakfast"), ["Both", "Morning"])
+
+    def test_any_tag_without_duplicates(self):
+        self.assertEqual(
+            self.names("tags=breakfast&tags=lunch"), ["Both", "Morning"])
+        self.assertEqual(
+            self.names("tags=lunch&tags=dinner"), ["Both", "Evening"])
+
+    def test_unknown_tag_is_rejected(self):
+        response = self.client_for().get("/api/v1/recipes/?tags=brunch")
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_tag_is_known_at_once(self):
+        self.assertEqual(self.names("tags=dinner"), ["Evening"])
+        brunch = Tag.objects.create(name="Brunch", slug="brunch")
+        self.morning.tags.add(brunch)
+        self.assertEqual(self.names("tags=brunch"), ["Morning"])
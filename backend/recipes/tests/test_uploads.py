@@ -0,0 +1,174 @@
+import base64
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from recipes.models import Recipe, Tag
+
+from .base import FoodgramTestCase, image_bytes
+
+URL = "/api/v1/uploads/"
+
+
+class ChunkedUploadTest(FoodgramTestCase):
+    """Resumable uploads: offsets, completion and use in image fields."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("uploader")
+        cls.other = cls.create_user("other")
+        cls.content = image_bytes((320, 240))
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.user)
+
+    def start(self, size=None):
+        response = self.client.post(URL, {
+            "filename": "photo.jpg",
+            "size": len(self.content) if size is None else size,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["offset"], 0)
+        self.assertFalse(response.data["complete"])
+        return response.data["token"]
+
+    def send(self, token, offset, chunk, client=None):
+        return (client or self.client).patch(
+            f"{URL}{token}/", chunk,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self):
+        token = self.start()
+        middle = len(self.content) // 2
+        self.send(token, 0, self.content[:middle])
+        response = self.send(token, middle, self.content[middle:])
+        self.assertTrue(response.data["complete"])
+        return token
+
+    def upload_files(self, token):
+        return [name for name in os.listdir(settings.CHUNKED_UPLOAD_ROOT)
+                if name.startswith(token)]
+
+    def test_chunks_advance_the_offset(self):
+        token = self.start()
+        middle = len(self.content) // 2
+        response = self.send(token, 0, self.content[:middle])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["offset"], middle)
+        self.assertFalse(response.data["complete"])
+        # A resuming client asks for the offset first.
+        response = self.client.get(f"{URL}{token}/")
+        self.assertEqual(response.data["offset"], middle)
+        response = self.send(token, middle, self.content[middle:])
+        self.assertEqual(response.data["offset"], len(self.content))
+        self.assertTrue(response.data["complete"])
+
+    def test_wrong_offset_is_a_conflict(self):
+        token = self.start()
+        self.send(token, 0, self.content[:10])
+        response = self.send(token, 0, self.content[:10])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f"{URL}{token}/").data["offset"], 10)
+
+    def test_missing_offset_header(self):
+        token = self.start()
+        response = self.client.patch(
+            f"{URL}{token}/", b"data",
+            content_type="application/offset+octet-stream")
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunk_beyond_the_size_is_rejected(self):
+        token = self.start(size=4)
+        response = self.send(token, 0, b"12345")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f"{URL}{token}/").data["offset"], 0)
+
+    @override_settings(CHUNKED_UPLOAD_MAX_SIZE=100)
+    def test_declared_size_is_limited(self):
+        response = self.client.post(
+            URL, {"filename": "big.jpg", "size": 101}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_uploads_are_private(self):
+        token = self.start()
+        other = self.client_for(self.other)
+        self.assertEqual(other.get(f"{URL}{token}/").status_code, 404)
+        self.assertEqual(
+            self.send(token, 0, self.content, client=other).status_code, 404)
+        self.assertEqual(other.delete(f"{URL}{token}/").status_code, 404)
+
+    def test_delete(self):
+        token = self.start()
+        self.assertEqual(
+            self.client.delete(f"{URL}{token}/").status_code, 204)
+        self.assertEqual(self.client.get(f"{URL}{token}/").status_code, 404)
+        self.assertEqual(self.upload_files(token), [])
+
+    def test_completed_upload_as_avatar(self):
+        token = self.upload()
+        response = self.client.put(
+            "/api/v1/users/me/avatar/", {"avatar": f"upload:{token}"},
+            format="json")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        with self.user.avatar.open("rb") as file:
+            self.assertEqual(file.read(), self.content)
+        # Used up once saved.
+        self.assertEqual(self.upload_files(token), [])
+
+    def test_incomplete_upload_is_rejected(self):
+        token = self.start()
+        self.send(token, 0, self.content[:10])
+        response = self.client.put(
+            "/api/v1/users/me/avatar/", {"avatar": f"upload:{token}"},
+            format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.upload_files(token)), 2)
+
+    def test_completed_upload_as_recipe_image(self):
+        tag = Tag.objects.create(name="Lunch", slug="lunch")
+        (ingredient,) = self.create_ingredients(1)
+        response = self.client.post("/api/v1/recipes/", {
+            "name": "Uploaded",
+            "text": "Text",
+            "cooking_time": 5,
+            "tags": [tag.pk],
+            "ingredients": [{"id": ingredient.pk, "amount": 1}],
+            "image": f"upload:{self.upload()}",
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(name="Uploaded")
+        with recipe.image.open("rb") as file:
+            self.assertEqual(file.read(), self.content)
+
+
+class AvatarUploadTest(FoodgramTestCase):
+    """Avatars sent as multipart files or base64 strings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("avatar")
+
+    def put(self, data, **kwargs):
+        response = self.client_for(self.user).put(
+            "/api/v1/users/me/avatar/", data, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return self.user.avatar
+
+    def test_multipart(self):
+        content = image_bytes()
+        avatar = self.put({"avatar": SimpleUploadedFile(
+            "photo.jpg", content, content_type="image/jpeg")},
+            format="multipart")
+        with avatar.open("rb") as file:
+            self.assertEqual(file.read(), content)
+
+    def test_base64(self):
+        encoded = base64.b64encode(image_bytes()).decode()
+        avatar = self.put(
+            {"avatar": f"data:image/jpeg;base64,{encoded}"}, format="json")
+        self.assertTrue(avatar.name)
@@ -0,0 +1,167 @@
+# recipes/uploads.py
+
+import fcntl
+import json
+import os
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+TOKEN_PREFIX = "upload:"
+TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{32}$")
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised when an upload is missing, foreign or out of sync."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ChunkedUploadedFile(UploadedFile):
+    """
+    A finished chunked upload.
+
+    Exposing temporary_file_path() lets the storage move the file into
+    place instead of copying it through memory. The file stays open until
+    finish() is called with it.
+    """
+
+    def __init__(self, path, name, size, token):
+        super().__init__(open(path, "rb"), name=name, size=size)
+        self.path = path
+        self.token = token
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def upload_root():
+    root = settings.CHUNKED_UPLOAD_ROOT
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def paths(token):
+    """Return (data, metadata) paths of an upload, validating the token."""
+    if not TOKEN_RE.match(token):
+        raise UploadError("Upload not found.", status=404)
+    root = upload_root()
+    return (os.path.join(root, f"{token}.part"),
+            os.path.join(root, f"{token}.json"))
+
+
+def load(token, user):
+    """Return metadata of the user's upload, including its offset."""
+    data_path, meta_path = paths(token)
+    try:
+        with open(meta_path, encoding="utf-8") as file:
+            meta = json.load(file)
+        offset = os.path.getsize(data_path)
+    except (OSError, ValueError):
+        raise UploadError("Upload not found.", status=404)
+    if meta["user"] != user.pk:
+        raise UploadError("Upload not found.", status=404)
+    return {**meta, "token": token, "offset": offset,
+            "complete": offset == meta["size"]}
+
+
+def purge_stale():
+    """Remove uploads older than CHUNKED_UPLOAD_EXPIRY seconds."""
+    root = upload_root()
+    deadline = time.time() - settings.CHUNKED_UPLOAD_EXPIRY
+    for entry in os.scandir(root):
+        try:
+            if entry.stat().st_mtime < deadline:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def create(user, filename, size):
+    """Start a new upload of size bytes and return its metadata."""
+    purge_stale()
+    token = secrets.token_urlsafe(24)
+    data_path, meta_path = paths(token)
+    open(data_path, "xb").close()
+    meta = {"user": user.pk, "filename": os.path.basename(filename),
+            "size": size}
+    with open(meta_path, "x", encoding="utf-8") as file:
+        json.dump(meta, file)
+    return load(token, user)
+
+
+def append(token, user, offset, stream):
+    """
+    Append the stream to the upload at offset, reading it in small
+    chunks. The offset must match the bytes already received, so a
+    client resumes by asking for the offset and sending the rest.
+    """
+    meta = load(token, user)
+    data_path, _ = paths(token)
+    with open(data_path, "r+b") as file:
+        # Serialize concurrent requests for the same upload.
+        fcntl.flock(file, fcntl.LOCK_EX)
+        file.seek(0, os.SEEK_END)
+        if file.tell() != offset:
+            raise UploadError(
+                f"Upload offset is {file.tell()}, not {offset}.", status=409)
+        start, remaining = offset, meta["size"] - offset
+        while stream is not None:
+            chunk = stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(chunk) > remaining:
+                file.truncate(start)
+                raise UploadError("Chunk exceeds the declared upload size.")
+            file.write(chunk)
+            offset += len(chunk)
+            remaining -= len(chunk)
+    return load(token, user)
+
+
+def remove(token):
+    for path in paths(token):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def delete(token, user):
+    load(token, user)
+    remove(token)
+
+
+def open_upload(value, user):
+    """
+    Resolve an "upload:<token>" value to a file ready to be saved.
+
+    The metadata is kept until finish() so a request rejected for other
+    reasons can be retried with the same token.
+    """
+    meta = load(value[len(TOKEN_PREFIX):], user)
+    if not meta["complete"]:
+        raise UploadError(
+            f"Upload is incomplete: {meta['offset']} of "
+            f"{meta['size']} bytes received.")
+    data_path, _ = paths(meta["token"])
+    return ChunkedUploadedFile(
+        data_path, meta["filename"], meta["size"], meta["token"])
+
+
+def finish(values, saved):
+    """
+    Close the chunked uploads among validated values. Once saved, the
+    upload is used up: whatever storage left of it is removed.
+    """
+    for value in values:
+        if isinstance(value, ChunkedUploadedFile):
+            value.close()
+            if saved:
+                remove(value.token)
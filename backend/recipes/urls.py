@@ -1,15 +1,28 @@
 # recipes/urls.py
 
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UploadViewSet
 
 router = DefaultRouter()
 router.register("tags", TagViewSet, basename="tags")
 router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("recipes", RecipeViewSet, basename="recipes")
+router.register("uploads", UploadViewSet, basename="uploads")
 
 urlpatterns = [
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    # Matched before the router, the viewsets stay as the fallback.
+    urlpatterns = [
+        path("tags/", async_views.tag_list),
+        path("ingredients/", async_views.ingredient_list),
+        path("recipes/", async_views.recipe_list),
+        path("recipes/<int:pk>/", async_views.recipe_detail),
+    ] + urlpatterns
@@ -1,36 +1,123 @@
 # recipes/views.py
 
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Prefetch
+from django.http import (Http404, HttpResponsePermanentRedirect, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
+from rest_framework.utils.urls import replace_query_param
+from users.pagination import RecipeCursorPagination, RecipePagination
+
+from . import (boot, catalog, feed, payloads, shopping_list, short_links,
+               uploads)
+from .cache import INGREDIENTS_VERSION, TAGS_VERSION
+from .conditional import (catalog_validators, conditional,
+                          recipe_list_validators, recipe_validators)
 from .filters import IngredientFilter, RecipeFilter
 from .models import Ingredient, Recipe, RecipeIngredient, Tag
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (CSVShoppingListRenderer, PDFShoppingListRenderer,
+                        TextShoppingListRenderer)
+from .search import get_ingredient_index
 from .serializers import (FavoriteCreateSerializer, FavoriteDeleteSerializer,
                           IngredientSerializer, RecipeCreateUpdateSerializer,
                           RecipeSerializer, RecipeShortSerializer,
                           ShoppingCartCreateSerializer,
-                          ShoppingCartDeleteSerializer, TagSerializer)
-
-
-def recipe_short_link(id):
-    """Handle short links for recipes."""
-    recipe = get_object_or_404(Recipe, id=id)
-    try:
-        frontend_url = f'/recipes/{recipe.id}/'
-        return redirect(frontend_url)
-    except Exception:
-        return HttpResponse(
-            "Error accessing recipe. Please try again later.",
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
+                          ShoppingCartDeleteSerializer, TagSerializer,
+                          UploadCreateSerializer)
+
+User = get_user_model()
+
+
+@require_safe
+def recipe_short_link(request, code):
+    """Redirect a short link to the recipe page its code decodes to."""
+    return short_link_redirect(short_links.resolve(code))
+
+
+@require_safe
+def legacy_short_link(request, id):
+    """Redirect a link shared before short codes, made of the recipe id."""
+    return short_link_redirect(
+        id if short_links.recipe_exists(id) else None)
+
+
+def short_link_redirect(recipe_id):
+    if recipe_id is None:
+        raise Http404("Recipe not found.")
+    response = HttpResponsePermanentRedirect(f"/recipes/{recipe_id}/")
+    patch_cache_control(
+        response, public=True, max_age=settings.SHORT_LINK_MAX_AGE)
+    return response
+
+
+@require_safe
+def readiness(request):
+    """Report whether this process can serve requests."""
+    if not boot.is_ready():
+        return JsonResponse({"status": "starting"}, status=503)
+    return JsonResponse({"status": "ready"})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def database_stats(request):
+    """
+    Report the database connections of this process: their settings and
+    the pool counters (connections, waiting requests, timeouts...).
+    """
+    databases = {}
+    for connection in connections.all(initialized_only=True):
+        get_pool_stats = getattr(connection, "get_pool_stats", None)
+        databases[connection.alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "connected": connection.connection is not None,
+            "pool": get_pool_stats and get_pool_stats(),
+        }
+    return Response({"pid": os.getpid(), "databases": databases})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def catalog_stats(request):
+    """Report the pre-rendered catalog hits and misses of this process."""
+    return Response({
+        "pid": os.getpid(),
+        "catalogs": {
+            name: {"hits": hits, "misses": misses}
+            for name, (hits, misses) in catalog.stats().items()
+        },
+    })
+
+
+def has_field(data, name):
+    """
+    Check that request data carries a field, including nested fields
+    sent as multipart form keys such as ingredients[0]id.
+    """
+    return name in data or any(
+        key.startswith(f"{name}[") for key in data)
+
+
+@conditional(catalog_validators(TAGS_VERSION), name="list")
+@conditional(catalog_validators(TAGS_VERSION), name="retrieve")
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for tags."""
 
@@ -39,7 +126,15 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Serve the tag list from the pre-rendered catalog cache."""
+        if catalog.servable(request):
+            return catalog.response(request, "tags")
+        return super().list(request, *args, **kwargs)
 
+
+@conditional(catalog_validators(INGREDIENTS_VERSION), name="list")
+@conditional(catalog_validators(INGREDIENTS_VERSION), name="retrieve")
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for ingredients."""
 
@@ -50,34 +145,51 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        """
+        Answer name searches from the in-memory ingredient index and
+        the full list from the pre-rendered catalog cache.
+        """
+        name = request.query_params.get("name")
+        if name:
+            return Response(get_ingredient_index().search(name))
+        if catalog.servable(request):
+            return catalog.response(request, "ingredients")
+        return super().list(request, *args, **kwargs)
+
 
+@conditional(recipe_list_validators, name="list")
+@conditional(recipe_validators, name="retrieve")
 class RecipeViewSet(viewsets.ModelViewSet):
     """ViewSet for recipes."""
 
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
     def get_queryset(self):
-        queryset = Recipe.objects.all()
-
-        # Get tags parameter from request
-        tags = self.request.query_params.getlist("tags")
-
-        if tags:
-            # Import Q for OR query construction
-            from django.db.models import Q
-
-            # Build an OR filter for tags
-            tag_filter = Q()
-            for tag in tags:
-                tag_filter |= Q(tags__slug=tag)
+        if self.action in ("list", "retrieve"):
+            # Reads are assembled from cached payloads.
+            return payloads.page_queryset()
+        # Per-user flags come from the user's cached relation sets.
+        return Recipe.objects.select_related("author").prefetch_related(
+            "tags",
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient"),
+            ),
+        )
 
-            # Apply the filter and ensure distinct results
-            queryset = queryset.filter(tag_filter).distinct()
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(payloads.build(page, request))
 
-        return queryset
+    def retrieve(self, request, *args, **kwargs):
+        return Response(payloads.build([self.get_object()], request)[0])
 
     def update(self, request, *args, **kwargs):
         """
@@ -91,10 +203,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if not partial:
             missing_fields = []
 
-            if "ingredients" not in request.data:
+            if not has_field(request.data, "ingredients"):
                 missing_fields.append("ingredients")
 
-            if "tags" not in request.data:
+            if not has_field(request.data, "tags"):
                 missing_fields.append("tags")
 
             if "image" not in request.data:
@@ -118,6 +230,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
 
+        # Drop prefetched tags/ingredients so the response is fresh
+        instance._prefetched_objects_cache = {}
+
         return Response(serializer.data)
 
     def get_serializer_class(self):
@@ -195,36 +310,63 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[TextShoppingListRenderer,
+                              CSVShoppingListRenderer,
+                              JSONRenderer,
+                              PDFShoppingListRenderer])
     def download_shopping_cart(self, request):
-        """Download shopping cart as text file."""
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__in_shopping_cart__user=request.user) .values(
-                "ingredient__name",
-                "ingredient__measurement_unit") .annotate(
-                amount=Sum("amount")))
-
-        if not ingredients:
-            return Response({"errors": "Shopping cart is empty"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        shopping_list = ["Список покупок:\n"]
-        for ingredient in ingredients:
-            name = ingredient["ingredient__name"]
-            measurement_unit = ingredient["ingredient__measurement_unit"]
-            amount = ingredient["amount"]
-            shopping_list.append(f"• {name} - {amount} {measurement_unit}")
-
-        response = HttpResponse(
-            "\n".join(shopping_list),
-            content_type="text/plain")
+        """
+        Stream the shopping list as txt, csv, json or pdf.
+
+        Rendered lists are cached per cart version, so repeated downloads
+        touch neither the database nor the renderer.
+        """
+        fmt = request.accepted_renderer.format
+        content_type, _ = shopping_list.FORMATS[fmt]
+        key = shopping_list.cache_key(request.user, fmt)
+        content = cache.get(key)
+
+        if content is not None:
+            chunks = shopping_list.iter_chunks(content)
+        else:
+            ingredients = shopping_list.get_items(request.user)
+            if not ingredients:
+                return Response({"errors": "Shopping cart is empty"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            chunks = shopping_list.render_and_cache(key, fmt, ingredients)
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
         response["Content-Disposition"] = (
-            "attachment; filename=shopping_list.txt"
+            f"attachment; filename=shopping_list.{fmt}"
         )
 
         return response
 
+    @action(detail=False, methods=["get"],
+            permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """
+        Recipes of the followed authors, newest first, read from the
+        user's timeline. Pages are linked with an opaque cursor.
+        """
+        after = None
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            after = feed.decode_cursor(cursor)
+            if after is None:
+                raise NotFound("Invalid cursor.")
+        size = RecipeCursorPagination().get_page_size(request)
+        ids, following = feed.page(request.user.pk, size, after)
+        recipes = payloads.page_queryset().in_bulk(ids)
+        return Response({
+            "next": following and replace_query_param(
+                request.build_absolute_uri(), "cursor",
+                feed.encode_cursor(following)),
+            "results": payloads.build(
+                [recipes[pk] for pk in ids if pk in recipes], request),
+        })
+
     @action(
         detail=True,
         methods=["get"],
@@ -232,9 +374,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.AllowAny],
     )
     def get_link(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, id=pk)
-        base_url = request.build_absolute_uri("/").rstrip("/")
-        short_link = f"{base_url}/s/{recipe.id}"
+        if not pk.isdigit() or not short_links.recipe_exists(int(pk)):
+            raise Http404("Recipe not found.")
+        short_link = request.build_absolute_uri(
+            reverse("recipe_short_link", args=[short_links.encode(int(pk))]))
 
         return Response({"short-link": short_link}, status=status.HTTP_200_OK)
 
@@ -243,3 +386,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadViewSet(viewsets.ViewSet):
+    """
+    Resumable chunked uploads.
+
+    POST {"filename", "size"} starts an upload and returns its token.
+    PATCH sends the next chunk as the raw request body, with the
+    Upload-Offset header set to the bytes already received; GET
+    returns that offset to resume an interrupted upload. A complete
+    upload is used as "upload:<token>" in any image field.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    lookup_field = "token"
+    lookup_value_regex = r"[A-Za-z0-9_-]+"
+
+    @staticmethod
+    def error(exc):
+        return Response({"errors": str(exc)}, status=exc.status)
+
+    def create(self, request):
+        serializer = UploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = uploads.create(request.user, **serializer.validated_data)
+        return Response(upload, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, token=None):
+        try:
+            return Response(uploads.load(token, request.user))
+        except uploads.UploadError as exc:
+            return self.error(exc)
+
+    def partial_update(self, request, token=None):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return Response(
+                {"errors": "Upload-Offset header is required"},
+                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Read the raw body, request.data would buffer it in memory.
+            upload = uploads.append(
+                token, request.user, offset, request.stream)
+        except uploads.UploadError as exc:
+            return self.error(exc)
+        return Response(upload)
+
+    def destroy(self, request, token=None):
+        try:
+            uploads.delete(token, request.user)
+        except uploads.UploadError as exc:
+            return self.error(exc)
+        return Response(status=status.HTTP_204_NO_CONTENT)
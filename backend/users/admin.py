@@ -13,10 +13,15 @@ User = get_user_model()
 class CustomUserAdmin(UserAdmin):
     """Admin configuration for User model."""
 
-    list_display = ('id', 'username', 'email', 'first_name', 'last_name')
+    list_display = (
+        'id', 'username', 'email', 'first_name', 'last_name',
+        'recipes_count', 'subscribers_count'
+    )
     search_fields = ('email', 'username', 'first_name', 'last_name')
     list_filter = ('is_staff', 'is_active', 'is_superuser')
-    readonly_fields = ('date_joined', 'last_login')
+    readonly_fields = (
+        'date_joined', 'last_login', 'recipes_count', 'subscribers_count'
+    )
 
     add_fieldsets = (
         (None, {
@@ -0,0 +1,23 @@
+# users/async_views.py
+
+from asgiref.sync import sync_to_async
+from recipes.async_views import (authenticate, json_request, json_response,
+                                 with_fallback)
+
+from .serializers import CustomUserSerializer
+from .views import UserMeView
+
+
+def serialize_user(request):
+    return CustomUserSerializer(
+        request.user, context={'request': request}).data
+
+
+@with_fallback(UserMeView.as_view())
+async def user_me(request):
+    """Async UserMeView; anonymous requests get the sync 401."""
+    if not json_request(request) or not await authenticate(request):
+        return None
+    if not request.user.is_authenticated:
+        return None
+    return json_response(await sync_to_async(serialize_user)(request))
@@ -0,0 +1,246 @@
+# users/authentication.py
+
+"""
+Authentication without a database lookup per request.
+
+CachedTokenAuthentication resolves token -> user through a small
+per-process LRU, then the shared cache and only then the database.
+The shared cache holds the user id and flags only, never the password
+hash or the user row; users found there load lazily. Entries are
+dropped on logout and whenever the user is saved (password change,
+deactivation, profile updates). The LRU of other processes isn't
+reachable, so its entries expire after AUTH_TOKEN_LOCAL_TIMEOUT seconds.
+
+StatelessJWTAuthentication (AUTH_JWT mode) trusts the signed claims
+and only checks the cached set of revocations: JWTs issued before a
+user's password change, deactivation, staff change or logout.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from copy import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import TokenRevocation
+
+User = get_user_model()
+
+TOKEN_KEY = "users:token-user:{}"
+REVOCATIONS_KEY = "users:jwt:revocations"
+# Rebuilt from the database at least this often, in case a rebuild
+# raced with a revocation.
+REVOCATIONS_TIMEOUT = 60
+# Issue time of a token pair with sub-second precision, iat has whole
+# seconds only. Access tokens copy it from their refresh token.
+ISSUED_AT_CLAIM = "issued_at"
+
+
+class LocalCache:
+    """Thread-safe LRU of a bounded size with a per-entry time to live."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache(
+    settings.AUTH_TOKEN_LOCAL_SIZE, settings.AUTH_TOKEN_LOCAL_TIMEOUT)
+
+
+def get_cached(key):
+    """Return the (user, token) pair of a key from the local LRU only."""
+    found = local_cache.get(key)
+    # Every request gets its own user, views may change and save it.
+    return found and (copy(found[0]), found[1])
+
+
+def get_token(key):
+    """Return the (user, token) pair of a key, or None if it's unknown."""
+    found = get_cached(key)
+    if found is not None:
+        return found
+    cached = cache.get(TOKEN_KEY.format(key))
+    if cached is not None:
+        user_id, is_staff, is_active = cached
+        return (LazyUser(user_id, is_staff, is_active),
+                Token(key=key, user_id=user_id))
+    token = Token.objects.select_related("user").filter(key=key).first()
+    if token is None:
+        return None
+    user = token.user
+    cache.set(TOKEN_KEY.format(key), (user.pk, user.is_staff, user.is_active),
+              settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    local_cache.set(key, (user, token))
+    return copy(user), token
+
+
+def invalidate(keys):
+    """
+    Forget cached tokens, again on commit: a request running while the
+    transaction is open may cache the old rows.
+    """
+    keys = list(keys)
+
+    def delete():
+        for key in keys:
+            local_cache.delete(key)
+        cache.delete_many([TOKEN_KEY.format(key) for key in keys])
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def invalidate_user(user_id):
+    """Forget the cached token of a user."""
+    invalidate(
+        Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication backed by get_token()."""
+
+    def authenticate_credentials(self, key):
+        found = get_token(key)
+        if found is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        user, token = found
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted."))
+        return user, token
+
+
+def revocations():
+    """
+    Return {user_id: revoked_at timestamp} of the revocations that may
+    still reject an unexpired refresh token, from one cache key.
+    """
+    found = cache.get(REVOCATIONS_KEY)
+    if found is None:
+        since = timezone.now() - jwt_settings.REFRESH_TOKEN_LIFETIME
+        found = {
+            user_id: revoked_at.timestamp()
+            for user_id, revoked_at in TokenRevocation.objects.filter(
+                revoked_at__gte=since).values_list("user_id", "revoked_at")
+        }
+        cache.set(REVOCATIONS_KEY, found, REVOCATIONS_TIMEOUT)
+    return found
+
+
+def token_user_id(token):
+    """The user id claim, which simplejwt stores as a string."""
+    return User._meta.pk.to_python(token[jwt_settings.USER_ID_CLAIM])
+
+
+def is_revoked(token):
+    revoked_at = revocations().get(token_user_id(token))
+    if revoked_at is None:
+        return False
+    issued_at = token.get(ISSUED_AT_CLAIM)
+    if issued_at is None:
+        # Tokens without the claim only have iat: those issued within
+        # the second of the revocation are rejected too.
+        return token.get("iat", 0) <= revoked_at
+    return issued_at < revoked_at
+
+
+def revoke_tokens(user_id):
+    """Reject every JWT issued to the user so far."""
+    now = timezone.now()
+    TokenRevocation.objects.update_or_create(
+        user_id=user_id, defaults={"revoked_at": now})
+    TokenRevocation.objects.filter(
+        revoked_at__lt=now - jwt_settings.REFRESH_TOKEN_LIFETIME).delete()
+    cache.delete(REVOCATIONS_KEY)
+    transaction.on_commit(lambda: cache.delete(REVOCATIONS_KEY))
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    User known by its id and is_staff/is_active flags; any other
+    attribute loads the user row once.
+    """
+
+    def __init__(self, user_id, is_staff=False, is_active=True):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        # Found in the instance dict before the lazy lookup is tried.
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            is_staff=is_staff,
+            is_active=is_active,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that builds the user from the claims."""
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"))
+        if not validated_token.get("is_active", True):
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted."))
+        if is_revoked(validated_token):
+            raise InvalidToken(_("Token is revoked"))
+        return LazyUser(
+            token_user_id(validated_token),
+            is_staff=validated_token.get("is_staff", False),
+            is_active=validated_token.get("is_active", True),
+        )
+
+
+def get_jwt_user(raw_token):
+    """Return the user of an access token, None if it isn't valid."""
+    authentication = StatelessJWTAuthentication()
+    try:
+        return authentication.get_user(
+            authentication.get_validated_token(raw_token.encode()))
+    except (TokenError, exceptions.AuthenticationFailed):
+        return None
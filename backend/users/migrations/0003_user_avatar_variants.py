@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_variants",
+            field=models.JSONField(
+                default=dict, editable=False, verbose_name="Avatar variants"
+            ),
+        ),
+    ]
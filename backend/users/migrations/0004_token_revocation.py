@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_avatar_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenRevocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "user_id",
+                    models.BigIntegerField(unique=True, verbose_name="User ID"),
+                ),
+                ("revoked_at", models.DateTimeField(verbose_name="Revoked")),
+            ],
+            options={
+                "verbose_name": "Token revocation",
+                "verbose_name_plural": "Token revocations",
+            },
+        ),
+    ]
@@ -37,6 +37,21 @@ class User(AbstractUser):
         null=True,
         blank=True,
     )
+    avatar_variants = models.JSONField(
+        'Avatar variants',
+        default=dict,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Recipes',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Subscribers',
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -82,3 +97,23 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f'{self.user} follows {self.author}'
+
+
+class TokenRevocation(models.Model):
+    """JWTs issued to the user before this time are rejected."""
+
+    # Not a foreign key, the revocation outlives a deleted user.
+    user_id = models.BigIntegerField(
+        'User ID',
+        unique=True,
+    )
+    revoked_at = models.DateTimeField(
+        'Revoked',
+    )
+
+    class Meta:
+        verbose_name = 'Token revocation'
+        verbose_name_plural = 'Token revocations'
+
+    def __str__(self):
+        return f'{self.user_id} before {self.revoked_at}'
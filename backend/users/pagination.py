@@ -1,5 +1,5 @@
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -9,3 +9,73 @@ class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset pagination that supports the 'limit' query parameter.
+    """
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class RecipeCursorPagination(CustomCursorPagination):
+    """
+    Keyset pagination for recipes, newest first.
+
+    The cursor keys on pub_date only; '-id' orders recipes published at
+    the same instant, which the cursor steps over with an offset.
+    """
+    ordering = ('-pub_date', '-id')
+
+
+class UserCursorPagination(CustomCursorPagination):
+    """Keyset pagination for users."""
+    ordering = ('id',)
+
+
+class SelectablePagination(CustomPageNumberPagination):
+    """
+    Page number pagination that switches to keyset pagination
+    when the 'cursor' query parameter is present.
+
+    Cursor mode avoids COUNT(*) and OFFSET, so deep pages cost the same
+    as the first one. Send an empty 'cursor' to request the first page.
+    """
+    cursor_pagination_class = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            page = self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+            self.display_page_controls = (
+                self.cursor_paginator.display_page_controls)
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+
+class RecipePagination(SelectablePagination):
+    """Recipe pagination with optional keyset mode."""
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class UserPagination(SelectablePagination):
+    """User pagination with optional keyset mode."""
+    cursor_pagination_class = UserCursorPagination
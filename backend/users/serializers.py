@@ -1,15 +1,38 @@
 # users/serializers.py
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
+from recipes.fields import UploadImageField
+from recipes.images import image_url, variant_urls
+from recipes.relations import for_request
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import ISSUED_AT_CLAIM, is_revoked
 from .models import Subscription
 
 User = get_user_model()
 
 
+def recipes_limit(request):
+    """The recipes_limit query param, None if absent or invalid."""
+    value = request.query_params.get('recipes_limit', '') if request else ''
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def latest_recipes(queryset, limit):
+    """Newest recipes first, the short fields only, limited if given."""
+    queryset = queryset.order_by('-pub_date', '-id').only(
+        'id', 'author_id', 'name', 'image', 'image_variants',
+        'cooking_time', 'pub_date')
+    return queryset if limit is None else queryset[:limit]
+
+
 class SubscriptionDeleteSerializer(serializers.Serializer):
     """Serializer for deleting a subscription."""
 
@@ -51,6 +74,7 @@ class SubscriptionCreateSerializer(serializers.Serializer):
 
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         user = self.context['request'].user
         author = self.context['author']
@@ -74,31 +98,27 @@ class CustomUserSerializer(UserSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'first_name', 'last_name',
-            'email', 'is_subscribed', 'avatar'
+            'email', 'is_subscribed', 'avatar', 'avatar_variants'
         )
 
     def get_avatar(self, obj):
         """Get the full URL of the avatar or None if not set."""
-        if obj.avatar:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-            return obj.avatar.url
-        return None
+        return image_url(self.context.get('request'), obj.avatar)
+
+    def get_avatar_variants(self, obj):
+        """Get URLs of resized avatar variants."""
+        return variant_urls(
+            self.context.get('request'), obj.avatar, obj.avatar_variants)
 
     def get_is_subscribed(self, obj):
         """Check if authenticated user subscribed to the author."""
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            user=request.user, author=obj
-        ).exists()
+        return for_request(self.context.get('request')).is_subscribed(obj.pk)
 
 
 class CustomUserResponseOnCreateSerializer(UserSerializer):
@@ -115,34 +135,34 @@ class SubscriptionSerializer(CustomUserSerializer):
     """Serializer for subscriptions."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(CustomUserSerializer.Meta):
         fields = CustomUserSerializer.Meta.fields + \
             ('recipes', 'recipes_count')
 
+    def get_is_subscribed(self, obj):
+        """Authors are listed here because the user follows them."""
+        return True
+
     def get_recipes(self, obj):
         """Get recipes for the author with limit."""
         from recipes.serializers import RecipeShortSerializer
 
-        request = self.context.get('request')
-        limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
-
-        if limit:
-            recipes = recipes[:int(limit)]
-
-        return RecipeShortSerializer(recipes, many=True).data
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = latest_recipes(
+                obj.recipes.all(),
+                recipes_limit(self.context.get('request')))
 
-    def get_recipes_count(self, obj):
-        """Count number of recipes created by the author."""
-        return obj.recipes.count()
+        return RecipeShortSerializer(
+            recipes, many=True, context=self.context).data
 
 
 class SetAvatarSerializer(serializers.Serializer):
     """Serializer for setting user avatar."""
 
-    avatar = Base64ImageField(required=True)
+    avatar = UploadImageField(required=True)
 
 
 class SetAvatarResponseSerializer(serializers.ModelSerializer):
@@ -151,3 +171,24 @@ class SetAvatarResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('avatar',)
+
+
+class JWTObtainPairSerializer(TokenObtainPairSerializer):
+    """JWT pair carrying the claims StatelessJWTAuthentication trusts."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        token['is_active'] = user.is_active
+        token[ISSUED_AT_CLAIM] = timezone.now().timestamp()
+        return token
+
+
+class JWTRefreshSerializer(TokenRefreshSerializer):
+    """Refuse to refresh tokens issued before a revocation."""
+
+    def validate(self, attrs):
+        if is_revoked(RefreshToken(attrs['refresh'])):
+            raise InvalidToken('Token is revoked')
+        return super().validate(attrs)
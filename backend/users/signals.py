@@ -0,0 +1,100 @@
+# users/signals.py
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from recipes import feed
+from recipes.cache import bump_version, touch_recipes, user_version_name
+from recipes.images import schedule_variants, variants_saved
+from recipes.models import Recipe
+from recipes.relations import SUBSCRIPTIONS, record
+from recipes.signals import shift_counter
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate, invalidate_user, revoke_tokens
+from .models import Subscription, User
+
+# Fields rendered with every recipe of the user.
+PROFILE_FIELDS = {
+    'email', 'username', 'first_name', 'last_name', 'avatar',
+    'avatar_variants',
+}
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    # JWTs carry is_staff and is_active; set_password() keeps the raw
+    # password in _password until the user is saved.
+    instance._revoke_tokens = False
+    if not settings.AUTH_JWT or instance.pk is None:
+        return
+    staff_may_change = update_fields is None or 'is_staff' in update_fields
+    instance._revoke_tokens = (
+        instance._password is not None
+        or not instance.is_active
+        or staff_may_change and User.objects.filter(
+            pk=instance.pk).exclude(is_staff=instance.is_staff).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    schedule_variants(instance, 'avatar', 'avatar_variants')
+    if not created:
+        # Password changes, deactivation and profile updates.
+        invalidate_user(instance.pk)
+    if instance._revoke_tokens:
+        revoke_tokens(instance.pk)
+    if not created and (
+            update_fields is None or PROFILE_FIELDS & set(update_fields)):
+        touch_recipes(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    if settings.AUTH_JWT:
+        revoke_tokens(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_everywhere(sender, user, **kwargs):
+    if settings.AUTH_JWT and user is not None:
+        revoke_tokens(user.pk)
+
+
+@receiver(variants_saved, sender=User)
+def avatar_variants_saved(sender, pk, **kwargs):
+    invalidate_user(pk)
+    touch_recipes(Recipe.objects.filter(author_id=pk))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Logout, and the cascade of a deleted user.
+    invalidate([instance.key])
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    bump_version(user_version_name(instance.user_id))
+    if created:
+        record(instance.user_id, SUBSCRIPTIONS, instance.author_id)
+        shift_counter(User.objects.filter(pk=instance.author_id),
+                      'subscribers_count', 1)
+        feed.subscribed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    bump_version(user_version_name(instance.user_id))
+    record(instance.user_id, SUBSCRIPTIONS, instance.author_id, add=False)
+    feed.unsubscribed(instance.user_id, instance.author_id)
+    shift_counter(User.objects.filter(pk=instance.author_id),
+                  'subscribers_count', -1)
+    if User.objects.filter(
+        pk=instance.author_id,
+        subscribers_count=settings.FEED_FANOUT_LIMIT,
+    ).exists():
+        # Just fell back under the limit, recipes are copied again.
+        feed.unpopular(instance.author_id)
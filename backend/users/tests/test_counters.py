@@ -0,0 +1,38 @@
+from recipes.tests.base import FoodgramTestCase
+
+
+class SubscriberCountTest(FoodgramTestCase):
+    """subscribers_count follows subscribe and unsubscribe."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.readers = [cls.create_user(f"reader{index}") for index in range(3)]
+
+    def subscribe(self, user, method="post"):
+        return getattr(self.client_for(user), method)(
+            f"/api/v1/users/{self.author.pk}/subscribe/")
+
+    def subscribers(self):
+        self.author.refresh_from_db()
+        return self.author.subscribers_count
+
+    def test_subscribe_and_unsubscribe(self):
+        for reader in self.readers:
+            self.assertEqual(self.subscribe(reader).status_code, 201)
+        self.assertEqual(self.subscribers(), 3)
+        self.assertEqual(
+            self.subscribe(self.readers[0], "delete").status_code, 204)
+        self.assertEqual(self.subscribers(), 2)
+
+    def test_rejected_subscriptions_are_not_counted(self):
+        self.subscribe(self.readers[0])
+        self.assertEqual(self.subscribe(self.readers[0]).status_code, 400)
+        self.assertEqual(self.client_for(self.author).post(
+            f"/api/v1/users/{self.author.pk}/subscribe/").status_code, 400)
+        self.assertEqual(self.subscribers(), 1)
+
+    def test_recipes_count_in_subscription(self):
+        self.create_recipe(self.author)
+        response = self.subscribe(self.readers[0])
+        self.assertEqual(response.data["recipes_count"], 1)
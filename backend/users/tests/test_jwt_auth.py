@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.test import override_settings
+from recipes.tests.base import FoodgramTestCase
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken
+from users.authentication import (ISSUED_AT_CLAIM, CachedTokenAuthentication,
+                                  StatelessJWTAuthentication, get_jwt_user,
+                                  revoke_tokens)
+from users.serializers import JWTObtainPairSerializer, JWTRefreshSerializer
+
+ME = "/api/v1/users/me/"
+
+
+@override_settings(AUTH_JWT=True)
+class StatelessJWTAuthenticationTest(FoodgramTestCase):
+    """JWTs authenticate from their claims until they are revoked."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("member")
+
+    def setUp(self):
+        super().setUp()
+        # Views read the authentication classes when they're defined,
+        # as the settings do AUTH_JWT.
+        patcher = mock.patch.object(
+            APIView, "authentication_classes",
+            [StatelessJWTAuthentication, CachedTokenAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tokens(self):
+        return JWTObtainPairSerializer.get_token(self.user)
+
+    def client_with(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def refresh(self, refresh):
+        serializer = JWTRefreshSerializer(data={"refresh": str(refresh)})
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["access"]
+
+    def test_access_token_authenticates(self):
+        access = self.tokens().access_token
+        response = self.client_with(access).get(ME)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.user.pk)
+        # Revocations are cached now, the user comes from the claims.
+        with self.assertNumQueries(0):
+            user = get_jwt_user(str(access))
+            self.assertEqual(
+                (user.pk, user.is_staff, user.is_active),
+                (self.user.pk, False, True))
+
+    def test_claims(self):
+        refresh = self.tokens()
+        access = refresh.access_token
+        self.assertEqual(access["is_staff"], False)
+        self.assertEqual(access["is_active"], True)
+        self.assertEqual(access[ISSUED_AT_CLAIM], refresh[ISSUED_AT_CLAIM])
+
+    def test_password_change_revokes_tokens(self):
+        refresh = self.tokens()
+        client = self.client_with(refresh.access_token)
+        self.assertEqual(client.get(ME).status_code, 200)
+        self.user.set_password("new-foodgram-password")
+        self.user.save()
+        self.assertEqual(client.get(ME).status_code, 401)
+        with self.assertRaises(InvalidToken):
+            self.refresh(refresh)
+
+    def test_tokens_issued_after_a_revocation_work(self):
+        old = self.tokens()
+        revoke_tokens(self.user.pk)
+        new = self.tokens()
+        # Within the same second iat alone can't tell them apart.
+        self.assertLess(new["iat"] - old["iat"], 2)
+        self.assertEqual(
+            self.client_with(old.access_token).get(ME).status_code, 401)
+        self.assertEqual(
+            self.client_with(new.access_token).get(ME).status_code, 200)
+        access = self.refresh(new)
+        self.assertEqual(self.client_with(access).get(ME).status_code, 200)
+
+    def test_deactivation_revokes_tokens(self):
+        client = self.client_with(self.tokens().access_token)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get(ME).status_code, 401)
+
+    def test_logout_revokes_tokens(self):
+        client = self.client_with(self.tokens().access_token)
+        response = client.post("/api/v1/auth/token/logout/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(client.get(ME).status_code, 401)
+
+    def test_profile_edits_keep_tokens(self):
+        client = self.client_with(self.tokens().access_token)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertEqual(client.get(ME).status_code, 200)
+
+    def test_tokens_without_issued_at(self):
+        refresh = self.tokens()
+        del refresh[ISSUED_AT_CLAIM]
+        access = refresh.access_token
+        later = access["iat"] + 1
+        with mock.patch(
+                "users.authentication.revocations",
+                return_value={self.user.pk: float(later)}):
+            self.assertEqual(
+                self.client_with(access).get(ME).status_code, 401)
+        with mock.patch(
+                "users.authentication.revocations",
+                return_value={self.user.pk: float(access["iat"] - 1)}):
+            self.assertEqual(
+                self.client_with(access).get(ME).status_code, 200)
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from recipes.tests.base import FoodgramTestCase
+from rest_framework.test import APIClient
+from users.authentication import TOKEN_KEY, get_token, local_cache
+
+ME = "/api/v1/users/me/"
+
+
+class CachedTokenAuthenticationTest(FoodgramTestCase):
+    """Tokens resolve from the caches and stop working on logout."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("member")
+
+    def login(self, password="foodgram-password"):
+        response = APIClient().post("/api/v1/auth/token/login/", {
+            "email": self.user.email, "password": password})
+        self.assertEqual(response.status_code, 200)
+        return response.data["auth_token"]
+
+    def client_with(self, key):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+        return client
+
+    def test_token_authenticates(self):
+        response = self.client_with(self.login()).get(ME)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.user.pk)
+
+    def test_unknown_token(self):
+        response = self.client_with("0" * 40).get(ME)
+        self.assertEqual(response.status_code, 401)
+
+    def test_cached_lookups_need_no_queries(self):
+        key = self.login()
+        get_token(key)
+        with self.assertNumQueries(0):
+            user, _ = get_token(key)
+        self.assertEqual(user.pk, self.user.pk)
+        # Another process only finds the shared cache entry.
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            user, token = get_token(key)
+        self.assertEqual((user.pk, user.is_active), (self.user.pk, True))
+        self.assertEqual(token.key, key)
+
+    def test_shared_cache_holds_no_user_row(self):
+        key = self.login()
+        get_token(key)
+        self.assertEqual(
+            cache.get(TOKEN_KEY.format(key)),
+            (self.user.pk, False, True))
+
+    def test_logout_rejects_the_token(self):
+        key = self.login()
+        client = self.client_with(key)
+        self.assertEqual(client.get(ME).status_code, 200)
+        self.assertEqual(
+            client.post("/api/v1/auth/token/logout/").status_code, 204)
+        self.assertEqual(client.get(ME).status_code, 401)
+        self.assertIsNone(cache.get(TOKEN_KEY.format(key)))
+
+    def test_deactivation_rejects_the_token(self):
+        client = self.client_with(self.login())
+        self.assertEqual(client.get(ME).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get(ME).status_code, 401)
+
+    def test_profile_changes_are_seen(self):
+        client = self.client_with(self.login())
+        client.get(ME)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertEqual(client.get(ME).data["first_name"], "Renamed")
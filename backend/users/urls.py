@@ -1,5 +1,6 @@
 # users/urls.py
 
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -16,3 +17,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('', include('djoser.urls')),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import user_me
+
+    urlpatterns.insert(0, path('users/me/', user_me))
@@ -1,20 +1,25 @@
 # users/views.py
 
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
+from recipes import uploads
+from recipes.images import delete_variants
+from recipes.models import Recipe
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .pagination import CustomPageNumberPagination
+from .pagination import UserPagination
 from .serializers import (CustomUserCreateSerializer,
                           CustomUserResponseOnCreateSerializer,
                           CustomUserSerializer, SetAvatarResponseSerializer,
                           SetAvatarSerializer, SubscriptionCreateSerializer,
-                          SubscriptionDeleteSerializer, SubscriptionSerializer)
+                          SubscriptionDeleteSerializer, SubscriptionSerializer,
+                          latest_recipes, recipes_limit)
 
 User = get_user_model()
 
@@ -34,7 +39,7 @@ class CustomUserViewSet(UserViewSet):
 
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = UserPagination
 
     def get_permissions(self):
         if self.action == 'create':
@@ -92,7 +97,16 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Get user subscriptions."""
         user = request.user
-        subscriptions = User.objects.filter(subscribing__user=user)
+        # A sliced Prefetch is one ROW_NUMBER() OVER (PARTITION BY
+        # author_id) query for the latest recipes of the whole page.
+        subscriptions = User.objects.filter(
+            subscribing__user=user
+        ).prefetch_related(Prefetch(
+            'recipes',
+            queryset=latest_recipes(
+                Recipe.objects.all(), recipes_limit(request)),
+            to_attr='latest_recipes',
+        ))
         page = self.paginate_queryset(subscriptions)
 
         if page is not None:
@@ -117,15 +131,21 @@ class CustomUserViewSet(UserViewSet):
         user = request.user
 
         if request.method == 'PUT':
-            serializer = SetAvatarSerializer(data=request.data)
+            serializer = SetAvatarSerializer(
+                data=request.data, context={'request': request})
             serializer.is_valid(raise_exception=True)
 
             # Delete old avatar if exists
             if user.avatar:
                 user.avatar.delete(save=False)
 
-            user.avatar = serializer.validated_data['avatar']
-            user.save()
+            saved = False
+            try:
+                user.avatar = serializer.validated_data['avatar']
+                user.save()
+                saved = True
+            finally:
+                uploads.finish(serializer.validated_data.values(), saved)
 
             return Response(
                 SetAvatarResponseSerializer(user).data,
@@ -134,8 +154,10 @@ class CustomUserViewSet(UserViewSet):
 
         elif request.method == 'DELETE':
             if user.avatar:
+                delete_variants(user.avatar_variants)
                 user.avatar.delete()
                 user.avatar = None
+                user.avatar_variants = {}
                 user.save()
 
             return Response(status=status.HTTP_204_NO_CONTENT)